@@ -4,22 +4,76 @@ Batch Streamable ID Processor
 Processes all videos without streamable_ids using the proven extraction method
 """
 
+import os
 import sqlite3
 import time
 import json
 import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+from urllib.parse import urlparse
 from proven_extractor import ProvenExtractor
 
+class HostRateLimiter:
+    """Spaces request starts to each host at least min_interval seconds apart
+    
+    Time already spent on the previous request counts towards the interval,
+    so slow extractions are never followed by an extra fixed delay.
+    """
+    
+    def __init__(self, min_interval: float = 2.0):
+        self.min_interval = min_interval
+        self._next_allowed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def wait(self, url: str) -> float:
+        """Block until url's host may be requested again; returns seconds waited"""
+        host = urlparse(url).hostname or ''
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed.get(host, 0.0))
+            self._next_allowed[host] = start + self.min_interval
+        
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
 class BatchProcessor:
-    def __init__(self, db_path: str = "library_videos.db", chrome_port: int = 9222):
-        """Initialize batch processor"""
+    def __init__(self, db_path: str = "library_videos.db", chrome_port: int = 9222, workers: int = 1):
+        """Initialize batch processor
+        
+        workers > 1 runs that many extractions concurrently, one per open
+        ObjectivePersonality.com tab (each tab can only load one page at a time).
+        """
         self.db_path = Path(db_path)
         self.chrome_port = chrome_port
+        self.workers = max(1, workers)
+        self.rate_limiter = HostRateLimiter(min_interval=2.0)
         self.extractor = ProvenExtractor(chrome_port=chrome_port)
         
+        # Single long-lived connection keeps SQLite's page cache warm between
+        # queries; transactions are managed explicitly (autocommit otherwise)
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        # WAL lets readers run alongside the batched writer and NORMAL sync
+        # only fsyncs at checkpoints instead of on every commit
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA wal_autocheckpoint=1000")
+        self._conn.execute("PRAGMA cache_size=-65536")
+        self._conn.execute("PRAGMA temp_store=MEMORY")
+        
+        # Buffered (streamable_id, video_id) updates, flushed in one transaction
+        self._pending_updates: List[Tuple[str, str]] = []
+        self._updates_lock = threading.Lock()
+        self.flush_every = 25
+        
         # Setup logging
         self.logs_dir = Path("extraction_logs")
         self.logs_dir.mkdir(exist_ok=True)
@@ -38,6 +92,7 @@ class BatchProcessor:
             ]
         )
         self.logger = logging.getLogger(__name__)
+        self._ensure_indexes()
         
         # Load or create progress file
         self.progress_file = self.logs_dir / "progress.json"
@@ -48,13 +103,34 @@ class BatchProcessor:
         self.logger.info(f"📋 Logs: {self.log_file}")
         self.logger.info(f"🌐 Chrome Port: {self.chrome_port}")
     
+    def _ensure_indexes(self):
+        """Create the partial index that serves the pending-videos query"""
+        try:
+            # Only rows still missing a Streamable ID are indexed, so the
+            # index shrinks as the backlog is worked through
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_videos_pending
+                ON videos(id)
+                WHERE streamable_id IS NULL OR streamable_id = ''
+            """)
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"⚠️  Could not create pending-videos index: {e}")
+    
     def _load_progress(self) -> Dict:
         """Load processing progress from file"""
-        if self.progress_file.exists():
-            with open(self.progress_file, 'r') as f:
-                progress = json.load(f)
-                self.logger.info(f"📈 Loaded progress: {progress.get('processed', 0)} processed")
-                return progress
+        # A leftover .tmp means a save was interrupted; it is only used if
+        # the main file itself is unreadable
+        for path in (self.progress_file, self.progress_file.with_suffix('.json.tmp')):
+            if not path.exists():
+                continue
+            try:
+                with open(path, 'r') as f:
+                    progress = json.load(f)
+            except json.JSONDecodeError:
+                self.logger.warning(f"⚠️  Ignoring corrupt progress file: {path}")
+                continue
+            self.logger.info(f"📈 Loaded progress: {progress.get('processed', 0)} processed")
+            return progress
         
         return {
             'processed': 0,
@@ -66,83 +142,194 @@ class BatchProcessor:
         }
     
     def _save_progress(self):
-        """Save processing progress to file"""
-        with open(self.progress_file, 'w') as f:
+        """Save processing progress to file atomically (write temp, then rename)"""
+        tmp_file = self.progress_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
             json.dump(self.progress, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.progress_file)
     
-    def get_videos_without_streamable_ids(self, limit: Optional[int] = None, start_from_id: Optional[str] = None) -> List[Dict]:
-        """Get videos that need Streamable IDs extracted"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            base_query = """
-                SELECT id, title, video_url 
-                FROM videos 
-                WHERE (streamable_id IS NULL OR streamable_id = '') 
-                AND video_url IS NOT NULL
-                AND video_url != ''
-            """
-            
-            # Resume from last processed ID if specified
-            if start_from_id:
-                base_query += f" AND id > '{start_from_id}'"
+    _PENDING_WHERE = """
+        WHERE (streamable_id IS NULL OR streamable_id = '') 
+        AND video_url IS NOT NULL
+        AND video_url != ''
+    """
+    
+    def count_videos_without_streamable_ids(self, start_from_id: Optional[str] = None) -> int:
+        """Count videos that still need Streamable IDs (served by the partial index)"""
+        query = "SELECT COUNT(*) FROM videos" + self._PENDING_WHERE
+        params = []
+        if start_from_id:
+            query += " AND id > ?"
+            params.append(start_from_id)
+        return self._conn.execute(query, params).fetchone()[0]
+    
+    def get_videos_without_streamable_ids(self, limit: Optional[int] = None, start_from_id: Optional[str] = None,
+                                          page_size: int = 100) -> Iterator[Dict]:
+        """Yield videos that need Streamable IDs extracted
+        
+        Rows are read in keyset pages of page_size, so memory stays flat and
+        no read cursor is held open while updates are written.
+        """
+        query = "SELECT id, title, video_url FROM videos" + self._PENDING_WHERE
+        remaining = limit
+        last_id = start_from_id
+        
+        while remaining is None or remaining > 0:
+            page_limit = page_size if remaining is None else min(page_size, remaining)
+            params = []
+            page_query = query
             
-            base_query += " ORDER BY id"
+            # Resume from last processed ID if specified (keyset paging)
+            if last_id:
+                page_query += " AND id > ?"
+                params.append(last_id)
             
-            if limit:
-                base_query += f" LIMIT {limit}"
+            # The ordering comes from idx_videos_pending, so no sort step is needed
+            page_query += " ORDER BY id LIMIT ?"
+            params.append(page_limit)
             
-            cursor.execute(base_query)
-            results = cursor.fetchall()
+            rows = self._conn.execute(page_query, params).fetchall()
+            for r in rows:
+                yield {'id': r[0], 'title': r[1], 'video_url': r[2]}
             
-            return [{'id': r[0], 'title': r[1], 'video_url': r[2]} for r in results]
+            if len(rows) < page_limit:
+                return
+            last_id = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
     
     def update_database_with_streamable_id(self, video_id: str, streamable_id: str) -> bool:
-        """Update database with found Streamable ID"""
+        """Queue a found Streamable ID for the next batched database write"""
+        with self._updates_lock:
+            self._pending_updates.append((streamable_id, video_id))
+        self.logger.info(f"💾 Queued database update: {video_id} -> {streamable_id}")
+        return True
+    
+    def _flush_updates(self) -> bool:
+        """Write all queued Streamable IDs in a single transaction"""
+        with self._updates_lock:
+            updates, self._pending_updates = self._pending_updates, []
+        
+        if not updates:
+            return True
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "UPDATE videos SET streamable_id = ? WHERE id = ?",
-                    (streamable_id, video_id)
-                )
-                conn.commit()
-                
-                self.logger.info(f"💾 Database updated: {video_id} -> {streamable_id}")
-                return True
-                
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE videos SET streamable_id = ? WHERE id = ?",
+                updates
+            )
+            self._conn.commit()
+            
+            self.logger.info(f"💾 Database updated: {len(updates)} videos")
+            return True
+            
         except Exception as e:
-            self.logger.error(f"❌ Database update failed for {video_id}: {e}")
+            if self._conn.in_transaction:
+                self._conn.rollback()
+            # Keep the failed rows queued so the next flush retries them
+            with self._updates_lock:
+                self._pending_updates[:0] = updates
+            self.logger.error(f"❌ Database update failed for {len(updates)} videos: {e}")
             return False
     
-    def process_single_video(self, video: Dict) -> Optional[str]:
+    def process_single_video(self, video: Dict, extractor: Optional[ProvenExtractor] = None) -> Optional[str]:
         """Process a single video and return Streamable ID"""
+        extractor = extractor or self.extractor
         video_id = video['id']
         video_url = video['video_url']
-        title = video.get('title', 'Unknown')[:50] + "..." if len(video.get('title', '')) > 50 else video.get('title', 'Unknown')
+        # Titles are truncated by the %.50s specs, only when a record is emitted
+        title = video.get('title') or 'Unknown'
         
-        self.logger.info(f"🎬 Processing: {title} (ID: {video_id})")
-        self.logger.info(f"🔗 URL: {video_url}")
+        self.logger.info("🎬 Processing: %.50s (ID: %s)", title, video_id)
+        self.logger.info("🔗 URL: %s", video_url)
         
         try:
-            streamable_id = self.extractor.extract_streamable_id(video_url)
+            streamable_id = extractor.extract_streamable_id(video_url)
             
             if streamable_id:
                 # Update database
                 if self.update_database_with_streamable_id(video_id, streamable_id):
-                    self.logger.info(f"✅ SUCCESS: {title} -> {streamable_id}")
+                    self.logger.info("✅ SUCCESS: %.50s -> %s", title, streamable_id)
                     return streamable_id
                 else:
-                    self.logger.error(f"❌ Database update failed for {title}")
+                    self.logger.error("❌ Database update failed for %.50s", title)
                     return None
             else:
-                self.logger.warning(f"⚠️  No Streamable ID found for: {title}")
+                self.logger.warning("⚠️  No Streamable ID found for: %.50s", title)
                 return None
                 
         except Exception as e:
-            self.logger.error(f"❌ Processing error for {title}: {e}")
+            self.logger.error("❌ Processing error for %.50s: %s", title, e)
             return None
     
+    def _get_extractors(self) -> List[ProvenExtractor]:
+        """One extractor per OP tab, up to self.workers"""
+        if self.workers == 1:
+            return [self.extractor]
+        
+        try:
+            tabs = ProvenExtractor.find_op_tabs(self.chrome_port)[:self.workers]
+        except Exception as e:
+            self.logger.warning(f"⚠️  Could not list Chrome tabs ({e}), running with a single worker")
+            return [self.extractor]
+        
+        if not tabs:
+            return [self.extractor]
+        
+        # Open the missing tabs once; they share the signed-in browser profile
+        while len(tabs) < self.workers:
+            try:
+                tabs.append(ProvenExtractor.open_op_tab(self.chrome_port))
+            except Exception as e:
+                self.logger.warning(f"⚠️  Could not open another OP tab ({e}), "
+                                    f"running with {len(tabs)} workers")
+                break
+        else:
+            self.logger.info(f"🗂️  Using {len(tabs)} OP tabs")
+        
+        return [ProvenExtractor(chrome_port=self.chrome_port, tab_id=tab['id']) for tab in tabs]
+    
+    def _extract_all(self, videos: Iterable[Dict]) -> Iterator[Tuple[Dict, Optional[str]]]:
+        """Yield (video, streamable_id) in input order, one extraction in flight per tab"""
+        extractors = self._get_extractors()
+        idle = queue.Queue()
+        for extractor in extractors:
+            idle.put(extractor)
+        
+        def work(video: Dict) -> Optional[str]:
+            extractor = idle.get()
+            try:
+                # Rate limiting: at most one page load per host every 2 seconds
+                delay = self.rate_limiter.wait(video['video_url'])
+                if delay > 0:
+                    self.logger.info("⏳ Rate limiting: waited %.1f seconds", delay)
+                return self.process_single_video(video, extractor)
+            finally:
+                idle.put(extractor)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=len(extractors)) as executor:
+                # Bound the look-ahead so results are consumed (and progress
+                # recorded) in order without queueing the whole backlog
+                in_flight = deque()
+                for video in videos:
+                    in_flight.append((video, executor.submit(work, video)))
+                    if len(in_flight) > len(extractors):
+                        done_video, future = in_flight.popleft()
+                        yield done_video, future.result()
+                
+                while in_flight:
+                    done_video, future = in_flight.popleft()
+                    yield done_video, future.result()
+        finally:
+            # The per-tab extractors only live for this batch
+            for extractor in extractors:
+                if extractor is not self.extractor:
+                    extractor.close()
+    
     def process_batch(self, limit: Optional[int] = None) -> Dict:
         """Process a batch of videos"""
         self.logger.info("=" * 80)
@@ -154,13 +341,16 @@ class BatchProcessor:
         
         # Get videos to process
         start_from_id = self.progress.get('last_processed_id')
-        videos = self.get_videos_without_streamable_ids(limit=limit, start_from_id=start_from_id)
+        total = self.count_videos_without_streamable_ids(start_from_id=start_from_id)
+        if limit:
+            total = min(total, limit)
         
-        if not videos:
+        if not total:
             self.logger.info("🎉 No more videos to process!")
             return self.progress
         
-        self.logger.info(f"📊 Found {len(videos)} videos to process")
+        self.logger.info(f"📊 Found {total} videos to process")
+        videos = self.get_videos_without_streamable_ids(limit=limit, start_from_id=start_from_id)
         
         if start_from_id:
             self.logger.info(f"📍 Resuming from ID: {start_from_id}")
@@ -169,14 +359,11 @@ class BatchProcessor:
         session_successful = 0
         session_failed = 0
         
-        for i, video in enumerate(videos, 1):
-            self.logger.info(f"\n--- Video {i}/{len(videos)} ---")
-            self.logger.info(f"📈 Session Progress: {session_successful + session_failed}/{len(videos)} processed")
+        for i, (video, streamable_id) in enumerate(self._extract_all(videos), 1):
+            self.logger.info(f"\n--- Video {i}/{total} ---")
+            self.logger.info(f"📈 Session Progress: {session_successful + session_failed}/{total} processed")
             self.logger.info(f"🎯 Total Progress: {self.progress['processed']} videos processed overall")
             
-            # Process video
-            streamable_id = self.process_single_video(video)
-            
             # Update counters
             if streamable_id:
                 session_successful += 1
@@ -188,14 +375,10 @@ class BatchProcessor:
             self.progress['processed'] += 1
             self.progress['last_processed_id'] = video['id']
             
-            # Save progress periodically
-            if i % 5 == 0:  # Save every 5 videos
+            # Flush queued updates and save progress together so a crash
+            # never records progress past an unwritten Streamable ID
+            if i % self.flush_every == 0 and self._flush_updates():
                 self._save_progress()
-            
-            # Rate limiting: 2 second delay between requests
-            if i < len(videos):
-                self.logger.info("⏳ Rate limiting: waiting 2 seconds...")
-                time.sleep(2)
         
         # Final statistics
         self.logger.info("=" * 80)
@@ -213,8 +396,9 @@ class BatchProcessor:
         self.logger.info(f"❌ Total failed: {self.progress['failed']}")
         self.logger.info(f"🎯 Overall success rate: {self.progress['successful']/self.progress['processed']*100:.1f}%")
         
-        # Save final progress
-        self._save_progress()
+        # Flush remaining updates and save final progress
+        if self._flush_updates():
+            self._save_progress()
         
         return {
             'session_successful': session_successful,
@@ -226,32 +410,41 @@ class BatchProcessor:
     
     def get_processing_stats(self) -> Dict:
         """Get current processing statistics"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Total videos
-            cursor.execute("SELECT COUNT(*) FROM videos")
-            total_videos = cursor.fetchone()[0]
-            
-            # Videos with streamable_ids
-            cursor.execute("SELECT COUNT(*) FROM videos WHERE streamable_id IS NOT NULL AND streamable_id != ''")
-            videos_with_ids = cursor.fetchone()[0]
-            
-            # Videos without streamable_ids
-            remaining = total_videos - videos_with_ids
-            
-            return {
-                'total_videos': total_videos,
-                'videos_with_streamable_ids': videos_with_ids,
-                'videos_remaining': remaining,
-                'completion_percentage': (videos_with_ids / total_videos) * 100 if total_videos > 0 else 0,
-                'processed_this_session': self.progress['processed'],
-                'successful_this_session': self.progress['successful'],
-                'failed_this_session': self.progress['failed']
-            }
+        cursor = self._conn.cursor()
+        
+        # Total videos
+        cursor.execute("SELECT COUNT(*) FROM videos")
+        total_videos = cursor.fetchone()[0]
+        
+        # Videos with streamable_ids
+        cursor.execute("SELECT COUNT(*) FROM videos WHERE streamable_id IS NOT NULL AND streamable_id != ''")
+        videos_with_ids = cursor.fetchone()[0]
+        
+        # Videos without streamable_ids
+        remaining = total_videos - videos_with_ids
+        
+        return {
+            'total_videos': total_videos,
+            'videos_with_streamable_ids': videos_with_ids,
+            'videos_remaining': remaining,
+            'completion_percentage': (videos_with_ids / total_videos) * 100 if total_videos > 0 else 0,
+            'processed_this_session': self.progress['processed'],
+            'successful_this_session': self.progress['successful'],
+            'failed_this_session': self.progress['failed']
+        }
+    
+    def close(self):
+        """Flush pending updates and close the database connection and extractor"""
+        self._flush_updates()
+        self._conn.close()
+        self.extractor.close()
     
     def reset_progress(self):
-        """Reset processing progress (use with caution)"""
+        """Reset processing progress (use with caution)
+        
+        Only progress.json is reset; the database keeps WAL journal mode,
+        which is persistent and re-applied on every connection in __init__.
+        """
         self.progress = {
             'processed': 0,
             'successful': 0,
@@ -273,27 +466,31 @@ def main():
     parser.add_argument('--reset', action='store_true', help='Reset progress (use with caution)')
     parser.add_argument('--chrome-port', type=int, default=9222, help='Chrome debugging port')
     parser.add_argument('--db', type=str, default='library_videos.db', help='Database file path')
+    parser.add_argument('--workers', type=int, default=1, help='Concurrent extractions (one OP tab each)')
     
     args = parser.parse_args()
     
-    processor = BatchProcessor(db_path=args.db, chrome_port=args.chrome_port)
-    
-    if args.reset:
-        processor.reset_progress()
-        return
+    processor = BatchProcessor(db_path=args.db, chrome_port=args.chrome_port, workers=args.workers)
     
-    if args.stats:
-        stats = processor.get_processing_stats()
-        print("\n📊 Processing Statistics")
-        print("=" * 40)
-        print(f"Total videos in database: {stats['total_videos']}")
-        print(f"Videos with Streamable IDs: {stats['videos_with_streamable_ids']}")
-        print(f"Videos remaining: {stats['videos_remaining']}")
-        print(f"Completion: {stats['completion_percentage']:.1f}%")
-        return
-    
-    # Process videos
-    results = processor.process_batch(limit=args.limit)
+    try:
+        if args.reset:
+            processor.reset_progress()
+            return
+        
+        if args.stats:
+            stats = processor.get_processing_stats()
+            print("\n📊 Processing Statistics")
+            print("=" * 40)
+            print(f"Total videos in database: {stats['total_videos']}")
+            print(f"Videos with Streamable IDs: {stats['videos_with_streamable_ids']}")
+            print(f"Videos remaining: {stats['videos_remaining']}")
+            print(f"Completion: {stats['completion_percentage']:.1f}%")
+            return
+        
+        # Process videos
+        results = processor.process_batch(limit=args.limit)
+    finally:
+        processor.close()
     
     print(f"\n🎯 Batch processing complete!")
     print(f"✅ Successful: {results['session_successful']}")
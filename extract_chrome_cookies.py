@@ -7,7 +7,15 @@ import json
 import requests
 import websocket
 import threading
-import time
+
+try:
+    import orjson
+    # orjson emits UTF-8 bytes, which websocket-client sends as a text frame as-is
+    _cdp_dumps = orjson.dumps
+    _cdp_loads = orjson.loads
+except ImportError:  # optional - stdlib json is used instead
+    _cdp_dumps = json.dumps
+    _cdp_loads = json.loads
 
 def extract_cookies_from_chrome():
     print("🔍 Extracting cookies from Chrome debug session...")
@@ -34,15 +42,16 @@ def extract_cookies_from_chrome():
     
     # Extract cookies via WebSocket
     ws_url = op_tab.get('webSocketDebuggerUrl')
-    result = {'done': False, 'cookies': None, 'error': None}
+    result = {'cookies': None, 'error': None}
+    done = threading.Event()
     
     def on_message(ws, message):
         try:
-            data = json.loads(message)
+            data = _cdp_loads(message)
             
             if data.get('id') == 1:  # Network enable
                 print("✅ Network enabled, getting cookies...")
-                ws.send(json.dumps({'id': 2, 'method': 'Network.getAllCookies', 'params': {}}))
+                ws.send(_cdp_dumps({'id': 2, 'method': 'Network.getAllCookies', 'params': {}}))
                 
             elif data.get('id') == 2:  # Cookies response
                 if 'result' in data and 'cookies' in data['result']:
@@ -64,21 +73,21 @@ def extract_cookies_from_chrome():
                     result['cookies'] = op_cookies
                     print(f"✅ Extracted {len(op_cookies)} ObjectivePersonality cookies")
                 
-                result['done'] = True
+                done.set()
                 ws.close()
                 
         except Exception as e:
             result['error'] = str(e)
-            result['done'] = True
+            done.set()
             ws.close()
     
     def on_error(ws, error):
         result['error'] = str(error)
-        result['done'] = True
+        done.set()
     
     def on_open(ws):
         print("🔗 WebSocket connected")
-        ws.send(json.dumps({'id': 1, 'method': 'Network.enable', 'params': {}}))
+        ws.send(_cdp_dumps({'id': 1, 'method': 'Network.enable', 'params': {}}))
     
     # Connect
     ws = websocket.WebSocketApp(ws_url, on_open=on_open, on_message=on_message, on_error=on_error)
@@ -87,10 +96,7 @@ def extract_cookies_from_chrome():
     ws_thread.start()
     
     # Wait for completion
-    timeout = 15
-    while not result['done'] and timeout > 0:
-        time.sleep(0.5)
-        timeout -= 0.5
+    done.wait(timeout=15)
     
     if result['error']:
         print(f"❌ Error: {result['error']}")
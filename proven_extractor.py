@@ -7,18 +7,135 @@ Exact replication of the WebSocket method that successfully found yiv10d
 import json
 import requests
 import websocket
-import threading
 import time
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
+
+try:
+    import orjson
+    # orjson emits UTF-8 bytes, which websocket-client sends as a text frame as-is
+    _cdp_dumps = orjson.dumps
+    _cdp_loads = orjson.loads
+except ImportError:  # optional - stdlib json is used instead
+    _cdp_dumps = json.dumps
+    _cdp_loads = json.loads
+
+try:
+    import hyperscan
+except ImportError:  # optional - the re scan below is used instead
+    hyperscan = None
+
+# Cookies ObjectivePersonality.com authentication actually depends on
+# (the key cookies reported by extract_chrome_cookies.py)
+_AUTH_COOKIE_NAMES = frozenset({'XSRF-TOKEN', 'svSession', 'smSession', 'bSession', 'hs'})
+
+# Exact same regex patterns that successfully found yiv10d, fused into one
+# alternation so the DOM is scanned once instead of once per pattern
+_STREAMABLE_PATTERN = re.compile(
+    r'streamable\.com/([a-z0-9]{6,})'
+    r'|cdn-cf-east\.streamable\.com/image/([a-z0-9]+)'
+    r'|api\.streamable\.com/videos/([a-z0-9]+)',
+    re.IGNORECASE
+)
+# Same scan run inside the page so only the matched IDs cross the WebSocket
+_IN_PAGE_SCAN_JS = (
+    "Array.from(new Set(Array.from("
+    "document.documentElement.outerHTML.matchAll(new RegExp(%s, 'gi')), "
+    "m => m[1] || m[2] || m[3])))" % json.dumps(_STREAMABLE_PATTERN.pattern)
+)
+_STREAMABLE_PATTERN_BYTES = re.compile(_STREAMABLE_PATTERN.pattern.encode(), re.IGNORECASE)
+
+_HS_DATABASE = None
+if hyperscan is not None:
+    # Hyperscan only locates where each URL starts (fixed-width prefixes keep
+    # it to one callback per URL); the bytes regex then reads the ID there
+    _HS_DATABASE = hyperscan.Database()
+    _HS_DATABASE.compile(
+        expressions=[
+            rb'streamable\.com/[a-z0-9]{6}',
+            rb'cdn-cf-east\.streamable\.com/image/[a-z0-9]',
+            rb'api\.streamable\.com/videos/[a-z0-9]'
+        ],
+        ids=[0, 1, 2],
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST] * 3
+    )
+
+
+def _iter_streamable_ids(html: str) -> Iterator[str]:
+    """Yield Streamable ID candidates as the HTML is scanned (may repeat)"""
+    if _HS_DATABASE is None:
+        for match in _STREAMABLE_PATTERN.finditer(html):
+            # Each match fills exactly one of the three groups
+            yield match.group(match.lastindex)
+        return
+    
+    # Hyperscan reports every start in one pass before IDs are read out
+    
+    data = html.encode('utf-8')
+    starts = set()
+    
+    def on_match(pattern_id, start, end, flags, context):
+        starts.add(start)
+    
+    _HS_DATABASE.scan(data, match_event_handler=on_match)
+    
+    next_pos = 0
+    for start in sorted(starts):
+        # Skip starts inside a previous match, as re.findall would
+        if start < next_pos:
+            continue
+        match = _STREAMABLE_PATTERN_BYTES.match(data, start)
+        if match:
+            yield match.group(match.lastindex).decode()
+            next_pos = match.end()
+
 
 class ProvenExtractor:
-    def __init__(self, chrome_port: int = 9222):
-        """Initialize extractor with Chrome WebSocket connection"""
+    def __init__(self, chrome_port: int = 9222, tab_id: Optional[str] = None):
+        """Initialize extractor with Chrome WebSocket connection
+        
+        tab_id pins the extractor to one OP tab so several extractors can
+        run side by side; by default the first OP tab found is used.
+        """
         self.chrome_port = chrome_port
+        self.tab_id = tab_id
+        
+        # Keep-alive session to the Chrome debug port; the OP tab's WebSocket
+        # URL is cached and only re-discovered when connecting to it fails
+        self._chrome_session = requests.Session()
+        self._cached_ws_url = None
+        
+        # Keep-alive session and a small pool for validating candidate IDs
+        self._session = requests.Session()
+        self._validation_executor = ThreadPoolExecutor(max_workers=4)
+        
         self.cookies = self._load_cookies()
-        print(f"✅ Loaded {len(self.cookies)} authentication cookies")
+        # Only the auth cookies are sent to Chrome; fall back to the first 10
+        # if the file has none of the expected names
+        self._auth_cookies = ([c for c in self.cookies if c['name'] in _AUTH_COOKIE_NAMES]
+                              or self.cookies[:10])
+        print(f"✅ Loaded {len(self.cookies)} authentication cookies "
+              f"({len(self._auth_cookies)} sent to Chrome)")
+    
+    @staticmethod
+    def find_op_tabs(chrome_port: int = 9222, session=None) -> List[dict]:
+        """List open ObjectivePersonality.com tabs on the Chrome debug port"""
+        response = (session or requests).get(f'http://localhost:{chrome_port}/json/list', timeout=5)
+        return [tab for tab in response.json()
+                if 'objectivepersonality.com' in tab.get('url', '')
+                and tab.get('type', 'page') == 'page']
+    
+    @staticmethod
+    def open_op_tab(chrome_port: int = 9222, url: str = 'https://www.objectivepersonality.com') -> dict:
+        """Open a new ObjectivePersonality.com tab and return its /json entry"""
+        endpoint = f'http://localhost:{chrome_port}/json/new?{url}'
+        response = requests.put(endpoint, timeout=5)
+        if response.status_code == 405:  # Chrome before 111 only accepts GET
+            response = requests.get(endpoint, timeout=5)
+        response.raise_for_status()
+        return response.json()
     
     def _load_cookies(self) -> List[dict]:
         """Load authentication cookies from file"""
@@ -40,154 +157,42 @@ class ProvenExtractor:
         print(f"🔗 Connecting to Chrome on port {self.chrome_port}")
         
         try:
-            # First, look for existing objectivepersonality.com tabs
-            response = requests.get(f'http://localhost:{self.chrome_port}/json/list', timeout=5)
-            tabs = response.json()
-            
-            # Find existing objectivepersonality.com tab
-            op_tab = None
-            for tab in tabs:
-                if 'objectivepersonality.com' in tab.get('url', ''):
-                    op_tab = tab
-                    print(f"✅ Found existing OP tab: {tab.get('id')} - {tab.get('title', '')[:50]}")
-                    break
-            
-            if op_tab:
-                tab = op_tab
-                ws_url = tab.get('webSocketDebuggerUrl')
-            else:
-                # No OP tab found - ONLY use OP tabs as requested
-                print("❌ No ObjectivePersonality.com tabs available")
-                print("💡 Please open https://www.objectivepersonality.com in Chrome and try again")
-                return None
-            
+            from_cache = self._cached_ws_url is not None
+            ws_url = self._get_ws_url()
             if not ws_url:
-                print("❌ No WebSocket URL available")
                 return None
             
-            print(f"✅ Using WebSocket: {ws_url}")
-            
-            # Result container
-            result = {'html': None, 'done': False, 'error': None}
-            
-            def on_message(ws, message):
-                try:
-                    data = json.loads(message)
-                    
-                    # Handle enable responses
-                    if data.get('id') == 1:  # Page enable
-                        print("✅ Page domain enabled")
-                        # Enable Network domain for cookies
-                        command = {
-                            'id': 2,
-                            'method': 'Network.enable',
-                            'params': {}
-                        }
-                        ws.send(json.dumps(command))
-                        
-                    elif data.get('id') == 2:  # Network enable
-                        print("✅ Network domain enabled, setting cookies...")
-                        # Set authentication cookies
-                        for i, cookie in enumerate(self.cookies[:10]):  # Limit to first 10 for speed
-                            command = {
-                                'id': 100 + i,
-                                'method': 'Network.setCookie',
-                                'params': {
-                                    'name': cookie['name'],
-                                    'value': cookie['value'],
-                                    'domain': cookie.get('domain', '.objectivepersonality.com'),
-                                    'path': cookie.get('path', '/'),
-                                    'secure': cookie.get('secure', False),
-                                    'httpOnly': cookie.get('httpOnly', False)
-                                }
-                            }
-                            ws.send(json.dumps(command))
-                        
-                        # Wait then navigate
-                        time.sleep(2)
-                        navigate_command = {
-                            'id': 200,
-                            'method': 'Page.navigate',
-                            'params': {'url': url}
-                        }
-                        ws.send(json.dumps(navigate_command))
-                    
-                    # Handle navigation response
-                    elif data.get('id') == 200:
-                        print("📍 Page navigated with cookies, waiting longer for JavaScript...")
-                        time.sleep(15)  # Wait much longer for authenticated content to load
-                        
-                        # Extract DOM
-                        command = {
-                            'id': 300,
-                            'method': 'Runtime.evaluate',
-                            'params': {
-                                'expression': 'document.documentElement.outerHTML',
-                                'returnByValue': True
-                            }
-                        }
-                        ws.send(json.dumps(command))
-                    
-                    # Handle DOM extraction response
-                    elif data.get('id') == 300 and 'result' in data:
-                        result_data = data['result']
-                        
-                        if 'result' in result_data and 'value' in result_data['result']:
-                            html = result_data['result']['value']
-                            result['html'] = html
-                            print(f"✅ Got authenticated DOM: {len(html):,} bytes")
-                        
-                        result['done'] = True
-                        ws.close()
-                        
-                except Exception as e:
-                    result['error'] = str(e)
-                    result['done'] = True
-                    ws.close()
-            
-            def on_error(ws, error):
-                result['error'] = str(error)
-                result['done'] = True
-            
-            def on_open(ws):
-                print("🔗 WebSocket connected")
-                # Enable Page domain first
-                command = {
-                    'id': 1,
-                    'method': 'Page.enable',
-                    'params': {}
-                }
-                ws.send(json.dumps(command))
-            
-            # Connect and execute - same WebSocket setup
-            ws = websocket.WebSocketApp(
-                ws_url, 
-                on_open=on_open, 
-                on_message=on_message,
-                on_error=on_error
-            )
-            
-            ws_thread = threading.Thread(target=ws.run_forever)
-            ws_thread.daemon = True
-            ws_thread.start()
-            
-            # Wait with extended timeout for cookie authentication and slower loading
-            timeout = 45
-            while not result['done'] and timeout > 0:
-                time.sleep(0.5)
-                timeout -= 0.5
-            
-            if result['error']:
-                print(f"❌ WebSocket error: {result['error']}")
+            # One blocking request/response session over the tab's WebSocket
+            try:
+                ws = websocket.create_connection(ws_url, timeout=45)
+            except (ConnectionRefusedError, websocket.WebSocketException):
+                # The cached tab may have been closed - look it up again once
+                if not from_cache:
+                    raise
+                print("♻️  Cached OP tab unavailable, re-discovering tabs...")
+                self._cached_ws_url = None
+                ws_url = self._get_ws_url()
+                if not ws_url:
+                    return None
+                ws = websocket.create_connection(ws_url, timeout=45)
+            print("🔗 WebSocket connected")
+            try:
+                result = self._run_cdp_session(ws, url)
+            except websocket.WebSocketException as e:
+                print(f"❌ WebSocket error: {e}")
                 return None
+            finally:
+                ws.close()
             
-            if not result['html']:
+            if result['ids'] is not None:
+                streamable_id = self._select_valid_id(result['ids'])
+            elif result['html']:
+                # Extract Streamable IDs using exact same patterns that found yiv10d
+                streamable_id = self._extract_ids_from_html(result['html'])
+            else:
                 print("❌ No HTML retrieved")
                 return None
             
-            # Extract Streamable IDs using exact same patterns that found yiv10d
-            streamable_id = self._extract_ids_from_html(result['html'])
-            
             # Don't clean up OP tabs - keep them for reuse
             print("✅ Reused existing OP tab (no cleanup needed)")
             
@@ -195,50 +200,179 @@ class ProvenExtractor:
             
         except Exception as e:
             print(f"❌ Extraction error: {e}")
-            # Clean up tab on error too, but only if we created it
-            try:
-                if 'tab' in locals() and 'op_tab' in locals() and not op_tab:
-                    requests.get(f'http://localhost:{self.chrome_port}/json/close/{tab.get("id")}', timeout=2)
-            except:
-                pass
+            self._cached_ws_url = None
+            return None
+    
+    def _get_ws_url(self) -> Optional[str]:
+        """WebSocket URL of the OP tab to drive, from cache or /json/list"""
+        if self._cached_ws_url:
+            return self._cached_ws_url
+        
+        # First, look for existing objectivepersonality.com tabs
+        tabs = self.find_op_tabs(self.chrome_port, session=self._chrome_session)
+        
+        # Find existing objectivepersonality.com tab (the pinned one if set)
+        op_tab = None
+        for tab in tabs:
+            if self.tab_id is None or tab.get('id') == self.tab_id:
+                op_tab = tab
+                print(f"✅ Found existing OP tab: {tab.get('id')} - {tab.get('title', '')[:50]}")
+                break
+        
+        if not op_tab:
+            # No OP tab found - ONLY use OP tabs as requested
+            print("❌ No ObjectivePersonality.com tabs available")
+            print("💡 Please open https://www.objectivepersonality.com in Chrome and try again")
             return None
+        
+        ws_url = op_tab.get('webSocketDebuggerUrl')
+        if not ws_url:
+            print("❌ No WebSocket URL available")
+            return None
+        
+        print(f"✅ Using WebSocket: {ws_url}")
+        self._cached_ws_url = ws_url
+        return ws_url
+    
+    def _send_command(self, ws, command_id: int, method: str, params: Optional[dict] = None):
+        """Send one CDP command"""
+        ws.send(_cdp_dumps({'id': command_id, 'method': method, 'params': params or {}}))
+    
+    def _wait_for(self, ws, matches, deadline: float) -> Optional[dict]:
+        """Read CDP messages until one satisfies matches(); None once deadline passes"""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            ws.settimeout(remaining)
+            try:
+                data = _cdp_loads(ws.recv())
+            except websocket.WebSocketTimeoutException:
+                return None
+            if matches(data):
+                return data
+    
+    def _call(self, ws, command_id: int, method: str, params: Optional[dict], deadline: float) -> dict:
+        """Send a CDP command and block until its response arrives"""
+        self._send_command(ws, command_id, method, params)
+        response = self._wait_for(ws, lambda data: data.get('id') == command_id, deadline)
+        if response is None:
+            raise websocket.WebSocketTimeoutException(f"Timed out waiting for {method}")
+        return response
+    
+    def _run_cdp_session(self, ws, url: str) -> dict:
+        """Authenticate, navigate the tab to url and pull the Streamable candidates"""
+        # Extended timeout for cookie authentication and slower loading
+        deadline = time.monotonic() + 45
+        result = {'ids': None, 'html': None}
+        
+        self._call(ws, 1, 'Page.enable', None, deadline)
+        print("✅ Page domain enabled")
+        # Get Page.lifecycleEvent notifications (networkIdle)
+        self._call(ws, 3, 'Page.setLifecycleEventsEnabled', {'enabled': True}, deadline)
+        # Enable Network domain for cookies
+        self._call(ws, 2, 'Network.enable', None, deadline)
+        
+        print("✅ Network domain enabled, setting cookies...")
+        # Set authentication cookies in one command; its response confirms
+        # they are all stored, so navigation can follow immediately
+        if self._auth_cookies:
+            self._call(ws, 100, 'Network.setCookies', {'cookies': [
+                {
+                    'name': cookie['name'],
+                    'value': cookie['value'],
+                    'domain': cookie.get('domain', '.objectivepersonality.com'),
+                    'path': cookie.get('path', '/'),
+                    'secure': cookie.get('secure', False),
+                    'httpOnly': cookie.get('httpOnly', False)
+                }
+                for cookie in self._auth_cookies
+            ]}, deadline)
+        
+        navigated = self._call(ws, 200, 'Page.navigate', {'url': url}, deadline)
+        loader_id = navigated.get('result', {}).get('loaderId')
+        
+        # Scan as soon as the navigated document reports networkIdle, but
+        # never wait longer than the old fixed 15s delay
+        print("📍 Page navigated with cookies, waiting for network idle...")
+        idle = None
+        if loader_id:
+            idle = self._wait_for(
+                ws,
+                lambda data: (data.get('method') == 'Page.lifecycleEvent'
+                              and data['params'].get('name') == 'networkIdle'
+                              and data['params'].get('loaderId') == loader_id),
+                min(deadline, time.monotonic() + 15)
+            )
+        print(f"📄 {'Network idle' if idle else 'Network idle not reported after 15s'}, "
+              f"scanning page for Streamable IDs...")
+        
+        response = self._call(ws, 300, 'Runtime.evaluate',
+                              {'expression': _IN_PAGE_SCAN_JS, 'returnByValue': True}, deadline)
+        value = response.get('result', {}).get('result', {}).get('value')
+        if isinstance(value, list) and 'exceptionDetails' not in response.get('result', {}):
+            result['ids'] = value
+            print(f"✅ In-page scan found {len(value)} candidate IDs")
+            return result
+        
+        # Fall back to shipping the whole DOM and scanning it here
+        print("⚠️  In-page scan failed, extracting full DOM...")
+        response = self._call(ws, 301, 'Runtime.evaluate',
+                              {'expression': 'document.documentElement.outerHTML', 'returnByValue': True},
+                              deadline)
+        result_data = response.get('result', {})
+        if 'result' in result_data and 'value' in result_data['result']:
+            html = result_data['result']['value']
+            result['html'] = html
+            print(f"✅ Got authenticated DOM: {len(html):,} bytes")
+        
+        return result
     
     def _extract_ids_from_html(self, html: str) -> Optional[str]:
         """Extract Streamable IDs using exact patterns that found yiv10d"""
         print("🔍 Searching for Streamable IDs...")
         
-        # Exact same regex patterns that successfully found yiv10d
-        patterns = [
-            r'streamable\.com/([a-z0-9]{6,})',
-            r'cdn-cf-east\.streamable\.com/image/([a-z0-9]+)',
-            r'api\.streamable\.com/videos/([a-z0-9]+)'
-        ]
-        
-        found_ids = set()
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, html, re.IGNORECASE)
-            found_ids.update(matches)
-            if matches:
-                print(f"✅ Pattern '{pattern}' found: {matches}")
+        return self._select_valid_id(_iter_streamable_ids(html))
+    
+    def _select_valid_id(self, candidates: Iterable[str]) -> Optional[str]:
+        """Return the first candidate ID that Streamable confirms exists
         
-        # Filter to IDs with 6+ characters (same filtering as successful attempt)
-        valid_ids = [id for id in found_ids if len(id) >= 6]
+        Each new candidate is submitted for validation the moment it is
+        produced, so API round trips overlap with the rest of the scan.
+        """
+        futures = {}
+        seen = set()
+        for streamable_id in candidates:
+            # Filter to IDs with 6+ characters (same filtering as successful attempt)
+            if len(streamable_id) >= 6 and streamable_id not in seen:
+                seen.add(streamable_id)
+                future = self._validation_executor.submit(self._validate_streamable_id, streamable_id)
+                futures[future] = streamable_id
         
-        print(f"🎯 Found {len(valid_ids)} potential Streamable IDs: {valid_ids}")
+        print(f"🎯 Found {len(futures)} potential Streamable IDs: {list(futures.values())}")
         
-        # Validate each ID using exact same API validation
-        for streamable_id in valid_ids:
-            if self._validate_streamable_id(streamable_id):
-                return streamable_id
+        # First valid one wins
+        try:
+            for future in as_completed(futures):
+                if future.result():
+                    return futures[future]
+        finally:
+            for future in futures:
+                future.cancel()
         
         return None
     
+    def close(self):
+        """Stop the validation pool and close the HTTP sessions"""
+        self._validation_executor.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
+        self._chrome_session.close()
+    
     def _validate_streamable_id(self, streamable_id: str) -> bool:
         """Validate Streamable ID using exact same API approach"""
         try:
             print(f"🧪 Testing ID: {streamable_id}")
-            response = requests.get(f'https://api.streamable.com/videos/{streamable_id}', timeout=5)
+            response = self._session.get(f'https://api.streamable.com/videos/{streamable_id}', timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
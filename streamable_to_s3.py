@@ -2,17 +2,32 @@
 """
 Download videos from Streamable and upload to S3
 """
+import io
 import os
 import sys
 import json
 import time
+import random
 import sqlite3
+import functools
 import requests
 import boto3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import deque
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from datetime import datetime
-from typing import Optional, Dict, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import BinaryIO, Iterable, Optional, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # optional - stdlib json is used instead
+    _json_loads = json.loads
 
 # Configure logging
 logging.basicConfig(
@@ -21,26 +36,104 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Videos transferred at once; each worker buffers about 56 MB (see
+# StreamableToS3.buffer_bytes_per_worker), so the default peaks near 450 MB
+DEFAULT_WORKERS = 8
+
+class RangedDownload(io.RawIOBase):
+    """Sequential read-only view of a URL fetched as parallel HTTP Range GETs
+    
+    Up to `parts` chunks are in flight at once and handed out in order, so
+    memory stays bounded at roughly parts * chunk_size per file.
+    """
+    
+    def __init__(self, url: str, size: int, parts: int = 8, chunk_size: int = 4 * 1024 * 1024,
+                 session: Optional[requests.Session] = None):
+        super().__init__()
+        self.session = session or requests.Session()
+        self.url = url
+        self.size = size
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=parts)
+        self._starts = iter(range(0, size, chunk_size))
+        self._pending = deque()
+        self._current = memoryview(b'')
+        for _ in range(parts):
+            self._submit_next()
+    
+    def _submit_next(self):
+        start = next(self._starts, None)
+        if start is not None:
+            self._pending.append(self._executor.submit(self._fetch, start))
+    
+    def _fetch(self, start: int) -> bytes:
+        end = min(start + self.chunk_size, self.size) - 1
+        response = self.session.get(self.url, headers={'Range': f'bytes={start}-{end}'}, timeout=30)
+        if response.status_code != 206 or len(response.content) != end - start + 1:
+            raise IOError(f"Range {start}-{end} failed with status {response.status_code}")
+        return response.content
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        while not self._current:
+            if not self._pending:
+                return 0
+            self._current = memoryview(self._pending.popleft().result())
+            self._submit_next()
+        
+        n = min(len(buffer), len(self._current))
+        buffer[:n] = self._current[:n]
+        self._current = self._current[n:]
+        return n
+    
+    def close(self):
+        if not self.closed:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        super().close()
+
+
 class StreamableToS3:
-    def __init__(self, bucket_name: str = None, s3_prefix: str = "objectivepersonality/videos/"):
-        """Initialize the downloader with S3 configuration"""
+    def __init__(self, bucket_name: str = None, s3_prefix: str = "objectivepersonality/videos/",
+                 db_path: str = None, workers: int = DEFAULT_WORKERS):
+        """Initialize the downloader with S3 configuration
+        
+        workers is how many videos process_batch transfers at once.
+        """
         self.bucket_name = bucket_name or os.environ.get('S3_BUCKET_NAME', 'op-videos-storage')
         self.s3_prefix = s3_prefix
+        self.db_path = db_path or ('library_videos.db' if os.path.exists('library_videos.db') else '../library_videos.db')
+        self.workers = workers
         
-        # Initialize S3 client with zenex profile
-        try:
-            session = boto3.Session(profile_name='zenex')
-            self.s3_client = session.client('s3')
-            # Test S3 access
-            self.s3_client.list_buckets()
-            logger.info(f"✅ Connected to S3, will use bucket: {self.bucket_name}")
-        except Exception as e:
-            logger.error(f"❌ AWS S3 initialization failed: {e}")
-            self.s3_client = None
-            
-        # Create download directory
-        self.download_dir = "downloads"
-        os.makedirs(self.download_dir, exist_ok=True)
+        # Downloads are split into 4 MiB Range GETs, 4 in flight per video
+        self.download_parts = 4
+        self.download_chunk_size = 4 * 1024 * 1024
+        
+        # One pooled HTTP session so API calls and downloads reuse connections;
+        # the pool covers every worker's parallel range requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=64,
+            pool_maxsize=self.workers * self.download_parts,
+            max_retries=Retry(total=5, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Socket reads are done in 4 MiB blocks rather than small default chunks
+        self.read_buffer_size = 4 * 1024 * 1024
+        
+        # 8 MiB parts uploaded 4 at a time per video. The download stream is not
+        # seekable, so s3transfer copies every part into memory; cap how many
+        # it holds rather than leaving the default of 10 per video
+        self.transfer_config = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=8 * 1024 * 1024,
+            max_concurrency=4,
+            max_in_memory_upload_chunks=4,
+            use_threads=True
+        )
         
         # Track statistics
         self.stats = {
@@ -50,16 +143,90 @@ class StreamableToS3:
             'failed': 0,
             'already_exists': 0
         }
+        self._stats_lock = threading.Lock()
+        
+        # Keys under s3_prefix, filled by load_existing_keys() for batch runs
+        self._existing_keys = None
+        
+    @property
+    def buffer_bytes_per_worker(self) -> int:
+        """Most memory one transfer holds: range parts, the read buffer and upload parts"""
+        return ((self.download_parts + 1) * self.download_chunk_size + self.read_buffer_size
+                + self.transfer_config.max_in_memory_upload_chunks * self.transfer_config.multipart_chunksize)
+        
+    @functools.cached_property
+    def s3_client(self):
+        """S3 client with the zenex profile, created on first use"""
+        try:
+            session = boto3.Session(profile_name='zenex')
+            # Enough pooled connections for every worker's concurrent part uploads
+            client = session.client('s3', config=Config(
+                max_pool_connections=self.workers * self.transfer_config.max_concurrency,
+                retries={'mode': 'adaptive', 'max_attempts': 5},
+                tcp_keepalive=True
+            ))
+            logger.info(f"✅ S3 client ready, will use bucket: {self.bucket_name}")
+            return client
+        except Exception as e:
+            logger.error(f"❌ AWS S3 initialization failed: {e}")
+            return None
+            
+    def verify_s3(self) -> bool:
+        """Check the bucket is reachable before starting (opt-in with --verify)"""
+        try:
+            self.s3_client.head_bucket(Bucket=self.bucket_name)
+            logger.info(f"✅ Connected to S3, will use bucket: {self.bucket_name}")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Cannot access S3 bucket {self.bucket_name}: {e}")
+            return False
+            
+    @functools.cached_property
+    def db(self) -> sqlite3.Connection:
+        """Shared connection to the video database"""
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        try:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_streamable_id ON videos(streamable_id)")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠️  Could not create streamable_id index: {e}")
+        return conn
+        
+    def record_s3_keys(self, completed: List[Tuple[str, str]]) -> bool:
+        """Write (s3_key, video_id) pairs back to the database in one transaction
+        
+        The bucket is stored with each key, since other tools keep videos in
+        a different bucket.
+        """
+        if not completed:
+            return True
+            
+        try:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.executemany(
+                "UPDATE videos SET s3_key = ?, s3_bucket = ?, storage_mode = 's3' WHERE streamable_id = ?",
+                ((s3_key, self.bucket_name, video_id) for s3_key, video_id in completed)
+            )
+            self.db.execute("COMMIT")
+            logger.info(f"💾 Recorded S3 keys for {len(completed)} videos")
+            return True
+        except sqlite3.Error as e:
+            if self.db.in_transaction:
+                self.db.execute("ROLLBACK")
+            logger.error(f"❌ Failed to record S3 keys: {e}")
+            return False
         
     def get_streamable_info(self, video_id: str) -> Optional[Dict]:
         """Get video information from Streamable API"""
         try:
             # Try the public API first
             url = f"https://api.streamable.com/videos/{video_id}"
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 logger.info(f"✅ Got info for {video_id}: {data.get('title', 'No title')}")
                 return data
             else:
@@ -70,8 +237,47 @@ class StreamableToS3:
             logger.error(f"❌ Error getting info for {video_id}: {e}")
             return None
             
-    def download_video(self, video_id: str, video_info: Dict) -> Optional[str]:
-        """Download video from Streamable"""
+    def s3_key_for(self, video_id: str) -> str:
+        """S3 key a video is stored under"""
+        return f"{self.s3_prefix}{video_id}/{video_id}.mp4"
+    
+    def load_existing_keys(self) -> bool:
+        """List every key under s3_prefix once so existence checks need no request"""
+        try:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            self._existing_keys = {
+                obj['Key']
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=self.s3_prefix)
+                for obj in page.get('Contents', [])
+            }
+            logger.info(f"📋 Found {len(self._existing_keys)} existing objects in S3")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️  Could not list S3 objects, checking each video instead: {e}")
+            self._existing_keys = None
+            return False
+            
+    def existing_video_ids(self) -> List[str]:
+        """Video IDs found by load_existing_keys()"""
+        return [key.split('/')[-2] for key in self._existing_keys or () if key.count('/') >= 1]
+        
+    def exists_in_s3(self, video_id: str) -> bool:
+        """Check whether a video has already been uploaded"""
+        if self._existing_keys is not None:
+            return self.s3_key_for(video_id) in self._existing_keys
+            
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=self.s3_key_for(video_id))
+            return True
+        except Exception:
+            return False
+            
+    def download_video(self, video_id: str, video_info: Dict) -> Optional[BinaryIO]:
+        """Open a streaming download of the video from Streamable
+        
+        Returns a buffered file-like object over the HTTP body, so the bytes
+        go straight to S3 without touching local disk. Caller closes it.
+        """
         try:
             # Get the best quality video URL
             video_url = None
@@ -87,61 +293,42 @@ class StreamableToS3:
                 logger.error(f"❌ No video URL found in API response for {video_id}")
                 return None
                 
-            logger.info(f"📥 Downloading from: {video_url}")
+            logger.info(f"📥 Streaming from: {video_url}")
+            
+            # Use parallel Range GETs when the CDN supports them
+            head = self.session.head(video_url, allow_redirects=True, timeout=10)
+            size = int(head.headers.get('content-length', 0))
+            if (head.status_code == 200 and head.headers.get('accept-ranges') == 'bytes'
+                    and size > self.download_chunk_size):
+                ranged = RangedDownload(head.url, size, parts=self.download_parts,
+                                        chunk_size=self.download_chunk_size, session=self.session)
+                # BufferedReader returns full reads, which multipart parts require
+                return io.BufferedReader(ranged, buffer_size=self.read_buffer_size)
             
-            # Download the file
-            response = requests.get(video_url, stream=True, timeout=30)
+            # Otherwise open a single streaming download
+            response = self.session.get(video_url, stream=True, timeout=30)
             
             if response.status_code != 200:
                 logger.error(f"❌ Download failed with status {response.status_code}")
+                response.close()
                 return None
-                
-            # Save to local file
-            filename = f"{video_id}.mp4"
-            filepath = os.path.join(self.download_dir, filename)
-            
-            total_size = int(response.headers.get('content-length', 0))
-            
-            with open(filepath, 'wb') as f:
-                downloaded = 0
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            print(f"\r  Progress: {progress:.1f}%", end='', flush=True)
-                            
-            print()  # New line after progress
-            
-            file_size = os.path.getsize(filepath)
-            logger.info(f"✅ Downloaded {filename} ({file_size / 1024 / 1024:.1f} MB)")
-            
-            return filepath
+            
+            # Undo any transfer encoding so S3 receives the MP4 bytes themselves
+            response.raw.decode_content = True
+            return io.BufferedReader(response.raw, buffer_size=self.read_buffer_size)
             
         except Exception as e:
             logger.error(f"❌ Download error for {video_id}: {e}")
             return None
             
-    def upload_to_s3(self, filepath: str, video_id: str, metadata: Dict = None) -> bool:
-        """Upload video to S3"""
+    def upload_to_s3(self, fileobj: BinaryIO, video_id: str, metadata: Dict = None) -> bool:
+        """Upload a video stream to S3"""
         if not self.s3_client:
             logger.error("❌ S3 client not initialized")
             return False
             
         try:
-            filename = os.path.basename(filepath)
-            s3_key = f"{self.s3_prefix}{video_id}/{filename}"
-            
-            # Check if already exists
-            try:
-                self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
-                logger.info(f"⏭️  Video already exists in S3: {s3_key}")
-                self.stats['already_exists'] += 1
-                return True
-            except:
-                pass  # File doesn't exist, proceed with upload
+            s3_key = self.s3_key_for(video_id)
             
             # Prepare metadata
             upload_metadata = {
@@ -156,26 +343,31 @@ class StreamableToS3:
             # Upload to S3
             logger.info(f"☁️  Uploading to S3: s3://{self.bucket_name}/{s3_key}")
             
-            file_size = os.path.getsize(filepath)
-            
-            with open(filepath, 'rb') as f:
-                self.s3_client.upload_fileobj(
-                    f,
-                    self.bucket_name,
-                    s3_key,
-                    ExtraArgs={
-                        'Metadata': {k: str(v) for k, v in upload_metadata.items()},
-                        'ContentType': 'video/mp4'
-                    },
-                    Callback=lambda bytes_transferred: print(
-                        f"\r  Upload progress: {(bytes_transferred / file_size) * 100:.1f}%", 
-                        end='', 
-                        flush=True
-                    )
-                )
+            # Only totals are reported; per-part output garbles with parallel workers
+            uploaded = {'bytes': 0}
+            uploaded_lock = threading.Lock()
+            
+            def count_bytes(bytes_transferred):
+                with uploaded_lock:
+                    uploaded['bytes'] += bytes_transferred
+            
+            self.s3_client.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={
+                    'Metadata': {k: str(v) for k, v in upload_metadata.items()},
+                    'ContentType': 'video/mp4',
+                    # S3 verifies a CRC32 of every part as it arrives
+                    'ChecksumAlgorithm': 'CRC32'
+                },
+                Callback=count_bytes,
+                Config=self.transfer_config
+            )
                 
-            print()  # New line after progress
-            logger.info(f"✅ Uploaded to S3: {s3_key}")
+            logger.info(f"✅ Uploaded to S3: {s3_key} ({uploaded['bytes'] / 1024 / 1024:.1f} MB)")
+            if self._existing_keys is not None:
+                self._existing_keys.add(s3_key)
             
             return True
             
@@ -183,77 +375,139 @@ class StreamableToS3:
             logger.error(f"❌ S3 upload error: {e}")
             return False
             
+    def _count(self, stat: str):
+        """Increment a statistics counter from any worker thread"""
+        with self._stats_lock:
+            self.stats[stat] += 1
+            
+    def skip_existing(self, video_id: str) -> bool:
+        """Count and skip a video that is already in S3"""
+        if not self.exists_in_s3(video_id):
+            return False
+            
+        logger.info(f"⏭️  Video already exists in S3: {self.s3_key_for(video_id)}")
+        self._count('already_exists')
+        return True
+        
+    def prefetch_infos(self, video_ids: List[str], concurrency: int = 32) -> Dict[str, Optional[Dict]]:
+        """Fetch Streamable info for many videos at once, keyed by video ID"""
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return dict(zip(video_ids, executor.map(self.get_streamable_info, video_ids)))
+            
+    def open_video(self, video_id: str, title: str = None, video_info: Dict = None) -> Optional[Tuple[BinaryIO, Dict]]:
+        """Look up the video and open its stream"""
+        # Get video info unless it was prefetched
+        if video_info is None:
+            video_info = self.get_streamable_info(video_id)
+        if not video_info:
+            self._count('failed')
+            return None
+            
+        # Open the download stream
+        stream = self.download_video(video_id, video_info)
+        if not stream:
+            self._count('failed')
+            return None
+            
+        metadata = {
+            'title': title or video_info.get('title', ''),
+            'duration': video_info.get('duration', 0),
+            'created_at': video_info.get('created_at', '')
+        }
+        return stream, metadata
+        
+    def finish_video(self, video_id: str, stream: BinaryIO, metadata: Dict) -> bool:
+        """Upload an opened stream to S3 while it downloads"""
+        with stream:
+            uploaded = self.upload_to_s3(stream, video_id, metadata)
+            
+        if uploaded:
+            self._count('downloaded')
+            self._count('uploaded')
+        else:
+            self._count('failed')
+        return uploaded
+        
     def process_video(self, video_id: str, title: str = None) -> bool:
         """Process a single video: download and upload to S3"""
-        self.stats['attempted'] += 1
+        self._count('attempted')
         
         logger.info(f"\n{'='*60}")
         logger.info(f"Processing: {video_id} - {title or 'Unknown title'}")
         
         try:
-            # Get video info
-            video_info = self.get_streamable_info(video_id)
-            if not video_info:
-                self.stats['failed'] += 1
-                return False
+            # Skip before spending any Streamable bandwidth
+            if self.skip_existing(video_id):
+                return True
                 
-            # Download video
-            filepath = self.download_video(video_id, video_info)
-            if not filepath:
-                self.stats['failed'] += 1
+            opened = self.open_video(video_id, title)
+            if not opened:
                 return False
                 
-            self.stats['downloaded'] += 1
-            
-            # Upload to S3
-            metadata = {
-                'title': title or video_info.get('title', ''),
-                'duration': video_info.get('duration', 0),
-                'created_at': video_info.get('created_at', '')
-            }
-            
-            if self.upload_to_s3(filepath, video_id, metadata):
-                self.stats['uploaded'] += 1
-                
-                # Clean up local file
-                os.remove(filepath)
-                logger.info(f"🧹 Cleaned up local file: {filepath}")
-                
-                return True
-            else:
-                self.stats['failed'] += 1
-                return False
+            return self.finish_video(video_id, *opened)
                 
         except Exception as e:
             logger.error(f"❌ Processing error for {video_id}: {e}")
-            self.stats['failed'] += 1
+            self._count('failed')
             return False
             
-    def process_batch(self, videos: List[tuple], max_workers: int = 3):
-        """Process multiple videos in parallel"""
+    def process_batch(self, videos: List[tuple]):
+        """Process multiple videos in parallel, self.workers at a time
+        
+        Each worker downloads and uploads one video: the bytes only move
+        while upload_fileobj reads the stream, so the two can't be split
+        into separate pools without buffering whole files.
+        """
         logger.info(f"\n🚀 Starting batch processing of {len(videos)} videos")
-        logger.info(f"🔧 Using {max_workers} parallel workers")
+        logger.info(f"🔧 Using {self.workers} parallel workers "
+                    f"(up to {self.workers * self.buffer_bytes_per_worker / 1024 / 1024:.0f} MB of buffers)")
         
         start_time = time.time()
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all tasks
-            future_to_video = {
-                executor.submit(self.process_video, video_id, title): (video_id, title)
-                for video_id, title in videos
-            }
-            
-            # Process completed tasks
-            for future in as_completed(future_to_video):
-                video_id, title = future_to_video[future]
-                try:
-                    result = future.result()
-                    if result:
-                        logger.info(f"✅ Completed: {video_id}")
-                    else:
-                        logger.warning(f"⚠️  Failed: {video_id}")
-                except Exception as e:
-                    logger.error(f"❌ Exception for {video_id}: {e}")
+        # One listing replaces a head_object per video
+        if self._existing_keys is None:
+            self.load_existing_keys()
+        
+        # (s3_key, video_id) for every video now in S3, written once at the end
+        completed = []
+        
+        # Skip uploaded videos, then resolve all metadata before any transfer starts
+        pending = []
+        for video_id, title in videos:
+            self._count('attempted')
+            if self.skip_existing(video_id):
+                completed.append((self.s3_key_for(video_id), video_id))
+            else:
+                pending.append((video_id, title))
+                
+        infos = self.prefetch_infos([video_id for video_id, _ in pending])
+        ready = []
+        for video_id, title in pending:
+            if infos[video_id]:
+                ready.append((video_id, title, infos[video_id]))
+            else:
+                logger.warning(f"⚠️  Failed: {video_id}")
+                self._count('failed')
+                
+        def transfer(video):
+            video_id, title, video_info = video
+            logger.info(f"Processing: {video_id} - {title or 'Unknown title'}")
+            try:
+                opened = self.open_video(video_id, title, video_info)
+                if opened and self.finish_video(video_id, *opened):
+                    logger.info(f"✅ Completed: {video_id}")
+                    completed.append((self.s3_key_for(video_id), video_id))
+                else:
+                    logger.warning(f"⚠️  Failed: {video_id}")
+            except Exception as e:
+                logger.error(f"❌ Exception for {video_id}: {e}")
+                self._count('failed')
+                
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for _ in executor.map(transfer, ready):
+                pass
+                
+        self.record_s3_keys(completed)
                     
         # Print statistics
         elapsed = time.time() - start_time
@@ -268,26 +522,55 @@ class StreamableToS3:
         logger.info(f"   - Failed: {self.stats['failed']}")
         logger.info(f"   - Success rate: {(self.stats['uploaded'] / self.stats['attempted'] * 100):.1f}%")
 
-def test_five_videos():
+# Videos with a Streamable ID that have not been uploaded yet
+PENDING_WHERE = """
+    streamable_id IS NOT NULL
+    AND streamable_id != 'MANUAL_CHECK_REQUIRED'
+    AND (s3_key IS NULL OR s3_key = '')
+"""
+
+@functools.lru_cache(maxsize=None)
+def get_downloader(workers: int = DEFAULT_WORKERS) -> 'StreamableToS3':
+    """Shared StreamableToS3 instance, so its clients and connections are built once"""
+    return StreamableToS3(workers=workers)
+
+def select_random_pending(conn: sqlite3.Connection, n: int, exclude_ids: Iterable[str] = ()) -> List[tuple]:
+    """Pick up to n random pending videos without sorting the whole table
+    
+    exclude_ids (videos already in S3) are filtered out in SQL so they are
+    never scheduled at all.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS done(id TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM done")
+    conn.executemany("INSERT OR IGNORE INTO done(id) VALUES (?)", ((video_id,) for video_id in exclude_ids))
+    
+    try:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_pending_s3 ON videos(streamable_id) WHERE {PENDING_WHERE}")
+    except sqlite3.OperationalError as e:
+        logger.warning(f"⚠️  Could not create pending index: {e}")
+        
+    # Rowids come straight from the partial index; sample them, then seek each row
+    rowids = [row[0] for row in conn.execute(
+        f"SELECT rowid FROM videos WHERE {PENDING_WHERE} AND streamable_id NOT IN (SELECT id FROM done)"
+    )]
+    picked = random.sample(rowids, min(n, len(rowids)))
+    if not picked:
+        return []
+        
+    placeholders = ','.join('?' * len(picked))
+    return conn.execute(
+        f"SELECT streamable_id, title FROM videos WHERE rowid IN ({placeholders})", picked
+    ).fetchall()
+
+def test_five_videos(workers: int = DEFAULT_WORKERS):
     """Test the script with 5 videos from the database"""
-    # Get 5 videos from database
-    db_path = 'library_videos.db' if os.path.exists('library_videos.db') else '../library_videos.db'
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    downloader = get_downloader(workers)
     
-    # Get 5 random videos with streamable IDs that don't have S3 keys
-    cursor.execute("""
-        SELECT streamable_id, title 
-        FROM videos 
-        WHERE streamable_id IS NOT NULL 
-        AND streamable_id != 'MANUAL_CHECK_REQUIRED'
-        AND (s3_key IS NULL OR s3_key = '')
-        ORDER BY RANDOM()
-        LIMIT 5
-    """)
+    # Skip videos already in S3 before they are ever selected
+    downloader.load_existing_keys()
     
-    videos = cursor.fetchall()
-    conn.close()
+    # Get 5 random videos with streamable IDs that don't have S3 keys
+    videos = select_random_pending(downloader.db, 5, downloader.existing_video_ids())
     
     if not videos:
         logger.error("No videos found in database")
@@ -298,29 +581,17 @@ def test_five_videos():
         logger.info(f"  - {video_id}: {title}")
         
     # Process the videos
-    downloader = StreamableToS3()
-    downloader.process_batch(videos, max_workers=2)
+    downloader.process_batch(videos)
 
-def process_n_videos(n):
+def process_n_videos(n, workers: int = DEFAULT_WORKERS):
     """Process N videos from the database"""
-    # Get N videos from database
-    db_path = 'library_videos.db' if os.path.exists('library_videos.db') else '../library_videos.db'
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    downloader = get_downloader(workers)
     
-    # Get N random videos with streamable IDs that don't have S3 keys
-    cursor.execute("""
-        SELECT streamable_id, title 
-        FROM videos 
-        WHERE streamable_id IS NOT NULL 
-        AND streamable_id != 'MANUAL_CHECK_REQUIRED'
-        AND (s3_key IS NULL OR s3_key = '')
-        ORDER BY RANDOM()
-        LIMIT ?
-    """, (n,))
+    # Skip videos already in S3 before they are ever selected
+    downloader.load_existing_keys()
     
-    videos = cursor.fetchall()
-    conn.close()
+    # Get N random videos with streamable IDs that don't have S3 keys
+    videos = select_random_pending(downloader.db, n, downloader.existing_video_ids())
     
     if not videos:
         logger.error(f"No videos found in database")
@@ -331,29 +602,46 @@ def process_n_videos(n):
         logger.info(f"  - {video_id}: {title}")
         
     # Process the videos
-    downloader = StreamableToS3()
-    downloader.process_batch(videos, max_workers=2)
+    downloader.process_batch(videos)
 
 def main():
     """Main function to handle command line usage"""
-    if len(sys.argv) > 1:
-        if sys.argv[1] == '--test':
-            test_five_videos()
-        elif sys.argv[1].startswith('--') and sys.argv[1][2:].isdigit():
+    args = sys.argv[1:]
+    
+    # Optional worker count: --workers N
+    workers = DEFAULT_WORKERS
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+            
+    # Optional up-front S3 access check; otherwise the first real call reports errors
+    if '--verify' in args:
+        args.remove('--verify')
+        if not get_downloader(workers).verify_s3():
+            return
+            
+    if args:
+        if args[0] == '--test':
+            test_five_videos(workers)
+        elif args[0].startswith('--') and args[0][2:].isdigit():
             # Handle --N format
-            n = int(sys.argv[1][2:])
-            process_n_videos(n)
+            n = int(args[0][2:])
+            process_n_videos(n, workers)
         else:
             # Process specific video ID
-            video_id = sys.argv[1]
-            title = sys.argv[2] if len(sys.argv) > 2 else None
-            downloader = StreamableToS3()
+            video_id = args[0]
+            title = args[1] if len(args) > 1 else None
+            downloader = get_downloader(workers)
             downloader.process_video(video_id, title)
     else:
         print("Usage:")
         print("  python3 streamable_to_s3.py --test           # Test with 5 random videos")
         print("  python3 streamable_to_s3.py --N              # Process N random videos (e.g., --10, --200)")
         print("  python3 streamable_to_s3.py VIDEO_ID [TITLE] # Process specific video")
+        print(f"  Add --workers N to set how many videos transfer at once (default {DEFAULT_WORKERS});")
+        print("    each worker buffers up to ~56 MB, so peak memory is about N x 56 MB")
+        print("  Add --verify to check S3 access before starting")
         print("Examples:")
         print("  python3 streamable_to_s3.py --200            # Process 200 videos")
         print("  python3 streamable_to_s3.py thfwyf 'Elyse Myers'")
@@ -7,7 +7,6 @@ import json
 import requests
 import websocket
 import threading
-import time
 from pathlib import Path
 
 def test_authentication():
@@ -47,43 +46,19 @@ def test_authentication():
     
     # Test WebSocket connection and authentication
     ws_url = op_tab.get('webSocketDebuggerUrl')
-    result = {'done': False, 'authenticated': False, 'error': None}
+    result = {'navigated': False, 'authenticated': False, 'error': None}
+    done = threading.Event()
     
     def on_message(ws, message):
         try:
             data = json.loads(message)
             
-            if data.get('id') == 1:  # Page enable
-                ws.send(json.dumps({'id': 2, 'method': 'Network.enable', 'params': {}}))
-                
-            elif data.get('id') == 2:  # Network enable
-                # Set cookies
-                for i, cookie in enumerate(cookies[:10]):
-                    command = {
-                        'id': 100 + i,
-                        'method': 'Network.setCookie',
-                        'params': {
-                            'name': cookie['name'],
-                            'value': cookie['value'],
-                            'domain': cookie.get('domain', '.objectivepersonality.com'),
-                            'path': cookie.get('path', '/'),
-                            'secure': cookie.get('secure', False),
-                            'httpOnly': cookie.get('httpOnly', False)
-                        }
-                    }
-                    ws.send(json.dumps(command))
-                
-                # Navigate to library page to test auth
-                time.sleep(2)
-                ws.send(json.dumps({
-                    'id': 200, 
-                    'method': 'Page.navigate', 
-                    'params': {'url': 'https://www.objectivepersonality.com/library'}
-                }))
+            if data.get('id') == 200:  # Navigation started
+                print("📍 Navigated to library page, waiting for load...")
+                result['navigated'] = True
             
-            elif data.get('id') == 200:  # Navigation complete
-                print("📍 Navigated to library page, checking content...")
-                time.sleep(5)  # Wait for page load
+            elif data.get('method') == 'Page.loadEventFired' and result['navigated']:
+                print("📄 Library page loaded, checking content...")
                 
                 # Check if we're authenticated
                 ws.send(json.dumps({
@@ -129,21 +104,50 @@ def test_authentication():
                     else:
                         print("❌ NOT AUTHENTICATED - Please sign in manually")
                 
-                result['done'] = True
+                done.set()
                 ws.close()
                 
         except Exception as e:
             result['error'] = str(e)
-            result['done'] = True
+            done.set()
             ws.close()
     
     def on_error(ws, error):
         result['error'] = str(error)
-        result['done'] = True
+        done.set()
     
     def on_open(ws):
         print("🔗 WebSocket connected")
+        # Chrome runs commands in order, so send everything up front
+        # instead of waiting for each reply
         ws.send(json.dumps({'id': 1, 'method': 'Page.enable', 'params': {}}))
+        ws.send(json.dumps({'id': 2, 'method': 'Network.enable', 'params': {}}))
+        
+        # Set all cookies in one command
+        ws.send(json.dumps({
+            'id': 100,
+            'method': 'Network.setCookies',
+            'params': {
+                'cookies': [
+                    {
+                        'name': cookie['name'],
+                        'value': cookie['value'],
+                        'domain': cookie.get('domain', '.objectivepersonality.com'),
+                        'path': cookie.get('path', '/'),
+                        'secure': cookie.get('secure', False),
+                        'httpOnly': cookie.get('httpOnly', False)
+                    }
+                    for cookie in cookies
+                ]
+            }
+        }))
+        
+        # Navigate to library page to test auth; the load event triggers the check
+        ws.send(json.dumps({
+            'id': 200, 
+            'method': 'Page.navigate', 
+            'params': {'url': 'https://www.objectivepersonality.com/library'}
+        }))
     
     # Connect
     ws = websocket.WebSocketApp(ws_url, on_open=on_open, on_message=on_message, on_error=on_error)
@@ -152,10 +156,7 @@ def test_authentication():
     ws_thread.start()
     
     # Wait for completion
-    timeout = 30
-    while not result['done'] and timeout > 0:
-        time.sleep(0.5)
-        timeout -= 0.5
+    done.wait(timeout=30)
     
     if result['error']:
         print(f"❌ Error: {result['error']}")
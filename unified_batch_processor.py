@@ -4,21 +4,124 @@ Unified Batch Video Processor
 Processes all videos using the unified extraction method to handle multiple platforms
 """
 
+import os
+import operator
+import re
 import sqlite3
-import time
 import json
+import requests
 import logging
+import logging.handlers
+import queue
+import threading
+from contextlib import contextmanager
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional
-from unified_video_extractor import UnifiedVideoExtractor
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+from batch_processor import HostRateLimiter
+from unified_video_extractor import UnifiedVideoExtractor, VideoInfo
+
+# (VideoInfo field, videos column) pairs written back after extraction
+UPDATE_FIELDS = (
+    ('streamable_id', 'streamable_id'),
+    ('youtube_id', 'youtube_id'),
+    ('vimeo_id', 'vimeo_id'),
+    ('wistia_id', 'wistia_id'),
+    ('other_video_url', 'other_video_url'),
+    ('platform', 'video_platform'),
+)
+
+# One UPDATE statement per combination of present fields, keyed by the
+# bitmask of UPDATE_FIELDS indexes, so no SQL is built per video
+_UPDATE_TEMPLATES = {
+    mask: "UPDATE videos SET "
+    + ", ".join(f"{column} = ?" for i, (_, column) in enumerate(UPDATE_FIELDS) if mask >> i & 1)
+    + " WHERE id = ?"
+    for mask in range(1, 1 << len(UPDATE_FIELDS))
+}
+
+# Reads every UPDATE_FIELDS attribute of a VideoInfo in one call
+_update_values = operator.attrgetter(*(field for field, _ in UPDATE_FIELDS))
+
+# Video URLs that already point at a known platform; the named group that
+# matched is the VideoInfo field, so these skip the Chrome page load.
+# Streamable IDs follow _STREAMABLE_CANDIDATE_RE and must end the path segment.
+_DIRECT_URL_PATTERN = re.compile(
+    r'https?://(?:www\.|m\.)?(?:'
+    r'(?:youtube\.com/(?:watch\?v=|embed/|v/)|youtu\.be/)(?P<youtube_id>[a-zA-Z0-9_-]{11})'
+    r'|(?:player\.)?vimeo\.com/(?:video/)?(?P<vimeo_id>\d+)'
+    r'|streamable\.com/(?:e/)?(?P<streamable_id>(?![0-9]+(?:[/?#]|$))[a-z0-9]{6,8})(?=[/?#]|$)'
+    r'|(?:[\w-]+\.)?(?:wistia\.com|wistia\.net)/(?:medias|embed/iframe)/(?P<wistia_id>[a-z0-9]{10})'
+    r')',
+    re.IGNORECASE
+)
+
+
+def _classify_direct_url(url: str, extractor: UnifiedVideoExtractor) -> Optional[VideoInfo]:
+    """Return video information for a URL that names its platform directly, else None
+    
+    Streamable IDs are still confirmed with the API (a HEAD request, no
+    browser); one that is not valid falls back to the page load.
+    """
+    match = _DIRECT_URL_PATTERN.match(url)
+    if not match:
+        return None
+    
+    field = match.lastgroup
+    if field == 'streamable_id' and not extractor._first_valid_streamable_id([match.group(field)]):
+        return None
+    return VideoInfo(**{field: match.group(field)}, platform=field[:-len('_id')])
+
 
 class UnifiedBatchProcessor:
-    def __init__(self, db_path: str = "library_videos.db", chrome_port: int = 9222):
-        """Initialize unified batch processor"""
+    def __init__(self, db_path: str = "library_videos.db", chrome_port: int = 9222, workers: int = 1):
+        """Initialize unified batch processor
+        
+        workers > 1 runs that many extractions concurrently, one per Chrome
+        tab (each tab can only load one page at a time).
+        """
         self.db_path = Path(db_path)
         self.chrome_port = chrome_port
-        self.extractor = UnifiedVideoExtractor(chrome_port=chrome_port)
+        self.workers = max(1, workers)
+        self.rate_limiter = HostRateLimiter(min_interval=2.0)
+        
+        # One keep-alive HTTP session for the whole batch (Chrome debug port
+        # and Streamable API), instead of a new connection per request
+        self.http = requests.Session()
+        self.extractor = UnifiedVideoExtractor(chrome_port=chrome_port, session=self.http)
+        self._extractors = [self.extractor]
+        
+        # One long-lived writer connection, tuned once; transactions are
+        # managed explicitly (autocommit otherwise)
+        self._writer = sqlite3.connect(f"file:{self.db_path}?mode=rwc", uri=True, isolation_level=None,
+                                       check_same_thread=False, cached_statements=128)
+        # WAL appends each commit instead of rewriting a rollback journal and
+        # NORMAL sync only fsyncs at checkpoints; it also lets the readers
+        # below run while the writer commits
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.execute("PRAGMA busy_timeout=5000")
+        self._writer.execute("PRAGMA temp_store=MEMORY")
+        self._writer.execute("PRAGMA cache_size=-20000")
+        
+        # Read-only connections for the pending-videos and stats queries, so
+        # reads never wait on the writer's lock
+        self._readers: queue.Queue = queue.Queue()
+        for _ in range(2):
+            reader = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False,
+                                     cached_statements=128)
+            reader.execute("PRAGMA busy_timeout=5000")
+            self._readers.put(reader)
+        
+        # Queued update rows grouped by the mask of columns they set, so each
+        # group is written with one executemany in a single transaction
+        self._pending_updates: Dict[int, List[list]] = {}
+        self._updates_lock = threading.Lock()
+        self.flush_every = 50
+        # Refresh planner statistics once this many videos have been written
+        self.analyze_after = 1000
         
         # Setup logging
         self.logs_dir = Path("extraction_logs")
@@ -28,16 +131,25 @@ class UnifiedBatchProcessor:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.log_file = self.logs_dir / f"unified_extraction_session_{timestamp}.log"
         
-        # Setup logging
+        # Setup logging; records are handed to a background listener thread
+        # so file and console writes stay off the processing loop
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        log_handlers = [logging.FileHandler(self.log_file), logging.StreamHandler()]
+        for handler in log_handlers:
+            handler.setFormatter(formatter)
+        log_queue = queue.SimpleQueue()
+        self._log_listener = logging.handlers.QueueListener(log_queue, *log_handlers)
+        self._log_listener.start()
+        # The queue side only merges args into the message; the listener's
+        # handlers apply the real format
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
         logging.basicConfig(
             level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(self.log_file),
-                logging.StreamHandler()
-            ]
+            handlers=[queue_handler]
         )
         self.logger = logging.getLogger(__name__)
+        self._ensure_indexes()
         
         # Load or create progress file
         self.progress_file = self.logs_dir / "unified_progress.json"
@@ -48,158 +160,300 @@ class UnifiedBatchProcessor:
         self.logger.info(f"📋 Logs: {self.log_file}")
         self.logger.info(f"🌐 Chrome Port: {self.chrome_port}")
     
+    # Videos without any video platform info; the partial index below uses
+    # the same predicate so the planner can serve this query from it
+    _PENDING_WHERE = """
+        WHERE video_url IS NOT NULL
+        AND video_url != ''
+        AND (streamable_id IS NULL OR streamable_id = '')
+        AND (youtube_id IS NULL OR youtube_id = '')
+        AND (vimeo_id IS NULL OR vimeo_id = '')
+        AND (wistia_id IS NULL OR wistia_id = '')
+        AND (other_video_url IS NULL OR other_video_url = '')
+        AND (video_platform IS NULL OR video_platform = '')
+    """
+    
+    def _ensure_indexes(self):
+        """Create the partial index that serves the pending-videos query"""
+        try:
+            # Only rows still missing platform info are indexed, so the
+            # index shrinks as the backlog is worked through
+            self._writer.execute(
+                "CREATE INDEX IF NOT EXISTS idx_videos_pending_platform ON videos(id)"
+                + self._PENDING_WHERE
+            )
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"⚠️  Could not create pending-videos index: {e}")
+    
+    def _analyze(self):
+        """Recompute planner statistics for the videos table and its indexes"""
+        try:
+            self._writer.execute("ANALYZE videos")
+            self.logger.info("📐 Refreshed query planner statistics")
+        except sqlite3.Error as e:
+            self.logger.warning(f"⚠️  Could not analyze videos: {e}")
+    
+    def _optimize(self):
+        """Run PRAGMA optimize so statistics drifted by updates are refreshed"""
+        try:
+            self._writer.execute("PRAGMA optimize")
+        except sqlite3.Error as e:
+            self.logger.warning(f"⚠️  Could not optimize database: {e}")
+    
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection for the duration of a query"""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
     def _load_progress(self) -> Dict:
         """Load processing progress from file"""
-        if self.progress_file.exists():
-            with open(self.progress_file, 'r') as f:
-                progress = json.load(f)
-                self.logger.info(f"📈 Loaded progress: {progress.get('processed', 0)} processed")
-                return progress
+        # A leftover .tmp means a save was interrupted; it is only used if
+        # the main file itself is unreadable
+        for path in (self.progress_file, self.progress_file.with_suffix('.json.tmp')):
+            if not path.exists():
+                continue
+            try:
+                with open(path, 'r') as f:
+                    progress = json.load(f)
+            except json.JSONDecodeError:
+                self.logger.warning(f"⚠️  Ignoring corrupt progress file: {path}")
+                continue
+            progress['by_platform'] = Counter(progress.get('by_platform', {}))
+            self.logger.info(f"📈 Loaded progress: {progress.get('processed', 0)} processed")
+            return progress
         
         return {
             'processed': 0,
             'successful': 0,
             'failed': 0,
-            'by_platform': {
-                'streamable': 0,
-                'youtube': 0,
-                'vimeo': 0,
-                'wistia': 0,
-                'other': 0,
-                'direct': 0,
-                'none': 0
-            },
+            'by_platform': Counter(),
             'last_processed_id': None,
             'start_time': datetime.now().isoformat(),
             'session_count': 0
         }
     
     def _save_progress(self):
-        """Save processing progress to file"""
-        with open(self.progress_file, 'w') as f:
+        """Save processing progress to file atomically (write temp, then rename)"""
+        tmp_file = self.progress_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w') as f:
             json.dump(self.progress, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.progress_file)
     
-    def get_videos_to_process(self, limit: Optional[int] = None, start_from_id: Optional[str] = None) -> List[Dict]:
-        """Get videos that need video information extracted"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Query for videos without any video platform info
-            base_query = """
-                SELECT id, title, video_url 
-                FROM videos 
-                WHERE video_url IS NOT NULL
-                AND video_url != ''
-                AND (
-                    (streamable_id IS NULL OR streamable_id = '')
-                    AND (youtube_id IS NULL OR youtube_id = '')
-                    AND (vimeo_id IS NULL OR vimeo_id = '')
-                    AND (wistia_id IS NULL OR wistia_id = '')
-                    AND (other_video_url IS NULL OR other_video_url = '')
-                    AND (video_platform IS NULL OR video_platform = '')
-                )
-            """
-            
-            # Resume from last processed ID if specified
-            if start_from_id:
-                base_query += f" AND id > '{start_from_id}'"
+    def count_videos_to_process(self, start_from_id: Optional[str] = None) -> int:
+        """Count videos that still need video information (served by the partial index)"""
+        query = "SELECT COUNT(*) FROM videos" + self._PENDING_WHERE
+        params = []
+        if start_from_id:
+            query += " AND id > ?"
+            params.append(start_from_id)
+        with self._reader() as conn:
+            return conn.execute(query, params).fetchone()[0]
+    
+    def get_videos_to_process(self, limit: Optional[int] = None, start_from_id: Optional[str] = None,
+                              page_size: int = 500) -> Iterator[Dict]:
+        """Yield videos that need video information extracted
+        
+        Rows are read in keyset pages of page_size, so memory stays flat and
+        no read cursor is held open while updates are written.
+        """
+        # Query for videos without any video platform info
+        query = "SELECT id, title, video_url FROM videos" + self._PENDING_WHERE
+        remaining = limit
+        last_id = start_from_id
+        
+        while remaining is None or remaining > 0:
+            page_limit = page_size if remaining is None else min(page_size, remaining)
+            params = []
+            page_query = query
             
-            base_query += " ORDER BY id"
+            # Resume from last processed ID if specified (keyset paging)
+            if last_id:
+                page_query += " AND id > ?"
+                params.append(last_id)
             
-            if limit:
-                base_query += f" LIMIT {limit}"
+            # Bound values keep the SQL text fixed, so the cached statement is
+            # reused; the ordering comes from idx_videos_pending_platform
+            page_query += " ORDER BY id LIMIT ?"
+            params.append(page_limit)
             
-            cursor.execute(base_query)
-            results = cursor.fetchall()
+            # The reader is only held for one page, never across a yield
+            with self._reader() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                rows = cursor.execute(page_query, params).fetchall()
+            for row in rows:
+                yield dict(row)
             
-            return [{'id': r[0], 'title': r[1], 'video_url': r[2]} for r in results]
+            if len(rows) < page_limit:
+                return
+            last_id = rows[-1]['id']
+            if remaining is not None:
+                remaining -= len(rows)
     
-    def update_database_with_video_info(self, video_id: str, video_info: Dict) -> bool:
-        """Update database with extracted video information"""
+    def update_database_with_video_info(self, video_id: str, video_info: VideoInfo) -> bool:
+        """Queue extracted video information for the next batched database write"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Build update query based on found information
-                update_parts = []
-                params = []
-                
-                if video_info.get('streamable_id'):
-                    update_parts.append("streamable_id = ?")
-                    params.append(video_info['streamable_id'])
-                
-                if video_info.get('youtube_id'):
-                    update_parts.append("youtube_id = ?")
-                    params.append(video_info['youtube_id'])
-                
-                if video_info.get('vimeo_id'):
-                    update_parts.append("vimeo_id = ?")
-                    params.append(video_info['vimeo_id'])
-                
-                if video_info.get('wistia_id'):
-                    update_parts.append("wistia_id = ?")
-                    params.append(video_info['wistia_id'])
-                
-                if video_info.get('other_video_url'):
-                    update_parts.append("other_video_url = ?")
-                    params.append(video_info['other_video_url'])
-                
-                if video_info.get('platform'):
-                    update_parts.append("video_platform = ?")
-                    params.append(video_info['platform'])
-                
-                if update_parts:
-                    query = f"UPDATE videos SET {', '.join(update_parts)} WHERE id = ?"
-                    params.append(video_id)
-                    cursor.execute(query, params)
-                    conn.commit()
-                    
-                    self.logger.info(f"💾 Database updated: {video_id} -> Platform: {video_info.get('platform', 'none')}")
-                    return True
-                
-                return False
+            values = _update_values(video_info)
+            mask = sum(1 << i for i, value in enumerate(values) if value)
+            
+            if mask:
+                params = [value for value in values if value]
+                params.append(video_id)
+                with self._updates_lock:
+                    self._pending_updates.setdefault(mask, []).append(params)
                 
+                self.logger.info(f"💾 Queued database update: {video_id} -> Platform: {video_info.platform or 'none'}")
+                return True
+            
+            return False
+            
         except Exception as e:
             self.logger.error(f"❌ Database update failed for {video_id}: {e}")
             return False
     
-    def process_single_video(self, video: Dict) -> Dict:
+    def _flush_updates(self) -> bool:
+        """Write all queued video information in a single transaction"""
+        with self._updates_lock:
+            updates, self._pending_updates = self._pending_updates, {}
+        
+        if not updates:
+            return True
+        
+        try:
+            # IMMEDIATE takes the write lock up front rather than failing
+            # with SQLITE_BUSY when a reader is mid-query
+            self._writer.execute("BEGIN IMMEDIATE")
+            for mask, rows in updates.items():
+                self._writer.executemany(_UPDATE_TEMPLATES[mask], rows)
+            self._writer.commit()
+            
+            self.logger.info(f"💾 Database updated: {sum(map(len, updates.values()))} videos")
+            return True
+            
+        except Exception as e:
+            if self._writer.in_transaction:
+                self._writer.rollback()
+            # Keep the failed rows queued so the next flush retries them
+            with self._updates_lock:
+                for mask, rows in updates.items():
+                    self._pending_updates.setdefault(mask, [])[:0] = rows
+            self.logger.error(f"❌ Database update failed for {sum(map(len, updates.values()))} videos: {e}")
+            return False
+    
+    def process_single_video(self, video: Dict, extractor: Optional[UnifiedVideoExtractor] = None) -> VideoInfo:
         """Process a single video and return extraction results"""
+        extractor = extractor or self.extractor
         video_id = video['id']
         video_url = video['video_url']
-        title = video.get('title', 'Unknown')[:50] + "..." if len(video.get('title', '')) > 50 else video.get('title', 'Unknown')
+        title = video.get('title') or 'Unknown'
+        if len(title) > 50:
+            title = title[:50] + "..."
         
         self.logger.info(f"🎬 Processing: {title} (ID: {video_id})")
         self.logger.info(f"🔗 URL: {video_url}")
         
         try:
-            # Extract video information
-            video_info = self.extractor.extract_video_info(video_url)
+            # Extract video information; only page URLs need the browser
+            video_info = _classify_direct_url(video_url, extractor) or extractor.extract_video_info(video_url)
             
-            if video_info.get('error'):
-                self.logger.error(f"❌ Extraction error for {title}: {video_info['error']}")
+            if video_info.error:
+                self.logger.error(f"❌ Extraction error for {title}: {video_info.error}")
                 return video_info
             
             # Update database if any video information found
-            if video_info.get('platform'):
+            if video_info.platform:
                 if self.update_database_with_video_info(video_id, video_info):
-                    self.logger.info(f"✅ SUCCESS: {title} -> {video_info['platform']}")
-                    # Update platform counter
-                    platform = video_info['platform']
-                    if platform in self.progress['by_platform']:
-                        self.progress['by_platform'][platform] += 1
+                    self.logger.info(f"✅ SUCCESS: {title} -> {video_info.platform}")
                 else:
                     self.logger.error(f"❌ Database update failed for {title}")
-                    video_info['error'] = 'Database update failed'
+                    video_info.error = 'Database update failed'
             else:
                 self.logger.warning(f"⚠️  No video content found for: {title}")
-                self.progress['by_platform']['none'] += 1
             
             return video_info
                 
         except Exception as e:
             self.logger.error(f"❌ Processing error for {title}: {e}")
-            return {'error': str(e)}
+            return VideoInfo(error=str(e))
+    
+    def _get_extractors(self) -> List[UnifiedVideoExtractor]:
+        """One extractor per OP tab, up to self.workers"""
+        if self.workers == 1 or len(self._extractors) > 1:
+            return self._extractors
+        
+        try:
+            # Only OP tabs are taken over; the user's other tabs are left alone
+            tabs = [tab for tab in UnifiedVideoExtractor.list_tabs(self.chrome_port, session=self.http)
+                    if 'objectivepersonality.com' in tab.get('url', '')][:self.workers]
+        except Exception as e:
+            self.logger.warning(f"⚠️  Could not list Chrome tabs ({e}), running with a single worker")
+            return self._extractors
+        
+        if not tabs:
+            return self._extractors
+        
+        # Open the missing tabs once; they share the signed-in browser profile
+        while len(tabs) < self.workers:
+            try:
+                tabs.append(UnifiedVideoExtractor.open_tab(self.chrome_port, url='https://www.objectivepersonality.com',
+                                                           session=self.http))
+            except Exception as e:
+                self.logger.warning(f"⚠️  Could not open another OP tab ({e}), "
+                                    f"running with {len(tabs)} workers")
+                break
+        else:
+            self.logger.info(f"🗂️  Using {len(tabs)} OP tabs")
+        
+        self.extractor.close()
+        self._extractors = [UnifiedVideoExtractor(chrome_port=self.chrome_port, session=self.http, tab_id=tab['id'])
+                            for tab in tabs]
+        self.extractor = self._extractors[0]
+        return self._extractors
+    
+    def _extract_all(self, videos: Iterable[Dict]) -> Iterator[Tuple[Dict, VideoInfo]]:
+        """Yield (video, result) in input order, one extraction in flight per tab
+        
+        Extraction runs on background threads, so recording a result and
+        flushing database writes overlap with the next page loads.
+        """
+        extractors = self._get_extractors()
+        idle = queue.Queue()
+        for extractor in extractors:
+            idle.put(extractor)
+        
+        def work(video: Dict) -> VideoInfo:
+            extractor = idle.get()
+            try:
+                # Rate limiting: at most one page load per host every 2 seconds;
+                # direct platform URLs are classified without loading a page
+                if not _DIRECT_URL_PATTERN.match(video['video_url']):
+                    delay = self.rate_limiter.wait(video['video_url'])
+                    if delay > 0:
+                        self.logger.info("⏳ Rate limiting: waited %.1f seconds", delay)
+                return self.process_single_video(video, extractor)
+            finally:
+                idle.put(extractor)
+        
+        # Each extractor drives its own tab, which loads one page at a time
+        with ThreadPoolExecutor(max_workers=len(extractors)) as executor:
+            # Bound the look-ahead so results are consumed (and progress
+            # recorded) in order without queueing the whole backlog
+            in_flight = deque()
+            for video in videos:
+                in_flight.append((video, executor.submit(work, video)))
+                if len(in_flight) > len(extractors):
+                    done_video, future = in_flight.popleft()
+                    yield done_video, future.result()
+            
+            while in_flight:
+                done_video, future = in_flight.popleft()
+                yield done_video, future.result()
     
     def process_batch(self, limit: Optional[int] = None) -> Dict:
         """Process a batch of videos"""
@@ -212,13 +466,16 @@ class UnifiedBatchProcessor:
         
         # Get videos to process
         start_from_id = self.progress.get('last_processed_id')
-        videos = self.get_videos_to_process(limit=limit, start_from_id=start_from_id)
+        total = self.count_videos_to_process(start_from_id=start_from_id)
+        if limit:
+            total = min(total, limit)
         
-        if not videos:
+        if not total:
             self.logger.info("🎉 No more videos to process!")
             return self.progress
         
-        self.logger.info(f"📊 Found {len(videos)} videos to process")
+        self.logger.info(f"📊 Found {total} videos to process")
+        videos = self.get_videos_to_process(limit=limit, start_from_id=start_from_id)
         
         if start_from_id:
             self.logger.info(f"📍 Resuming from ID: {start_from_id}")
@@ -227,33 +484,38 @@ class UnifiedBatchProcessor:
         session_successful = 0
         session_failed = 0
         
-        for i, video in enumerate(videos, 1):
-            self.logger.info(f"\n--- Video {i}/{len(videos)} ---")
-            self.logger.info(f"📈 Session Progress: {session_successful + session_failed}/{len(videos)} processed")
-            self.logger.info(f"🎯 Total Progress: {self.progress['processed']} videos processed overall")
-            
-            # Process video
-            result = self.process_single_video(video)
-            
-            # Update counters
-            if result.get('platform'):
-                session_successful += 1
-                self.progress['successful'] += 1
-            else:
-                session_failed += 1
-                self.progress['failed'] += 1
-            
-            self.progress['processed'] += 1
-            self.progress['last_processed_id'] = video['id']
-            
-            # Save progress periodically
-            if i % 5 == 0:  # Save every 5 videos
-                self._save_progress()
-            
-            # Rate limiting: 2 second delay between requests
-            if i < len(videos):
-                self.logger.info("⏳ Rate limiting: waiting 2 seconds...")
-                time.sleep(2)
+        try:
+            for i, (video, result) in enumerate(self._extract_all(videos), 1):
+                # Per-video progress is formatted only when DEBUG is enabled;
+                # process_single_video already logs each outcome at INFO
+                self.logger.debug("📈 Video %d/%d - session %d/%d processed, %d overall",
+                                  i, total, session_successful + session_failed, total,
+                                  self.progress['processed'])
+                
+                # Update counters
+                if result.platform:
+                    session_successful += 1
+                    self.progress['successful'] += 1
+                else:
+                    session_failed += 1
+                    self.progress['failed'] += 1
+                
+                # Platform counter (kept here so concurrent workers never share it)
+                if not result.error:
+                    self.progress['by_platform'][result.platform or 'none'] += 1
+                
+                self.progress['processed'] += 1
+                self.progress['last_processed_id'] = video['id']
+                
+                # Flush queued updates and save progress together so a crash
+                # never records progress past unwritten video information
+                if i % self.flush_every == 0 and self._flush_updates():
+                    self._save_progress()
+                    if i == self.analyze_after:
+                        self._analyze()
+        finally:
+            # Whatever was extracted before an interruption still reaches the database
+            self._flush_updates()
         
         # Final statistics
         self.logger.info("=" * 80)
@@ -264,7 +526,7 @@ class UnifiedBatchProcessor:
         self.logger.info(f"📈 Session success rate: {session_successful/(session_successful + session_failed)*100:.1f}%")
         
         self.logger.info("\n📊 Platform Distribution (This Session):")
-        for platform, count in sorted(self.progress['by_platform'].items()):
+        for platform, count in self.progress['by_platform'].most_common():
             if count > 0:
                 self.logger.info(f"   {platform}: {count}")
         
@@ -276,8 +538,12 @@ class UnifiedBatchProcessor:
         self.logger.info(f"❌ Total failed: {self.progress['failed']}")
         self.logger.info(f"🎯 Overall success rate: {self.progress['successful']/self.progress['processed']*100:.1f}%")
         
-        # Save final progress
-        self._save_progress()
+        # Save final progress once every queued update is written
+        if self._flush_updates():
+            self._save_progress()
+        
+        # Let SQLite re-analyze whatever the session's updates made stale
+        self._optimize()
         
         return {
             'session_successful': session_successful,
@@ -290,55 +556,49 @@ class UnifiedBatchProcessor:
     
     def get_processing_stats(self) -> Dict:
         """Get current processing statistics"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Total videos
-            cursor.execute("SELECT COUNT(*) FROM videos")
-            total_videos = cursor.fetchone()[0]
-            
-            # Videos with any video platform
-            cursor.execute("""
-                SELECT COUNT(*) FROM videos 
-                WHERE streamable_id IS NOT NULL 
-                   OR youtube_id IS NOT NULL 
-                   OR vimeo_id IS NOT NULL 
-                   OR wistia_id IS NOT NULL 
-                   OR other_video_url IS NOT NULL
-            """)
-            videos_with_content = cursor.fetchone()[0]
-            
-            # Platform breakdown
-            platform_counts = {}
-            
-            cursor.execute("SELECT COUNT(*) FROM videos WHERE streamable_id IS NOT NULL AND streamable_id != ''")
-            platform_counts['streamable'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM videos WHERE youtube_id IS NOT NULL AND youtube_id != ''")
-            platform_counts['youtube'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM videos WHERE vimeo_id IS NOT NULL AND vimeo_id != ''")
-            platform_counts['vimeo'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM videos WHERE wistia_id IS NOT NULL AND wistia_id != ''")
-            platform_counts['wistia'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM videos WHERE other_video_url IS NOT NULL AND other_video_url != ''")
-            platform_counts['other'] = cursor.fetchone()[0]
-            
-            # Videos without any content
-            remaining = total_videos - videos_with_content
-            
-            return {
-                'total_videos': total_videos,
-                'videos_with_content': videos_with_content,
-                'videos_remaining': remaining,
-                'completion_percentage': (videos_with_content / total_videos) * 100 if total_videos > 0 else 0,
-                'platform_counts': platform_counts,
-                'processed_this_session': self.progress['processed'],
-                'successful_this_session': self.progress['successful'],
-                'failed_this_session': self.progress['failed']
-            }
+        with self._reader() as conn:
+            # All counts come from one pass over the table: COUNT(expr) skips
+            # NULLs, NULLIF turns empty strings into NULL and COALESCE is
+            # non-NULL when any platform column is set
+            total_videos, videos_with_content, *counts = conn.execute("""
+                SELECT COUNT(*),
+                       COUNT(COALESCE(streamable_id, youtube_id, vimeo_id, wistia_id, other_video_url)),
+                       COUNT(NULLIF(streamable_id, '')),
+                       COUNT(NULLIF(youtube_id, '')),
+                       COUNT(NULLIF(vimeo_id, '')),
+                       COUNT(NULLIF(wistia_id, '')),
+                       COUNT(NULLIF(other_video_url, ''))
+                FROM videos
+            """).fetchone()
+        
+        # Platform breakdown
+        platform_counts = dict(zip(('streamable', 'youtube', 'vimeo', 'wistia', 'other'), counts))
+        
+        # Videos without any content
+        remaining = total_videos - videos_with_content
+        
+        return {
+            'total_videos': total_videos,
+            'videos_with_content': videos_with_content,
+            'videos_remaining': remaining,
+            'completion_percentage': (videos_with_content / total_videos) * 100 if total_videos > 0 else 0,
+            'platform_counts': platform_counts,
+            'processed_this_session': self.progress['processed'],
+            'successful_this_session': self.progress['successful'],
+            'failed_this_session': self.progress['failed']
+        }
+    
+    def close(self):
+        """Flush pending updates, close connections and flush the log"""
+        self._flush_updates()
+        for extractor in self._extractors:
+            extractor.close()
+        self._writer.close()
+        while not self._readers.empty():
+            self._readers.get().close()
+        self.http.close()
+        # Stopping the listener drains any queued log records
+        self._log_listener.stop()
     
     def reset_progress(self):
         """Reset processing progress (use with caution)"""
@@ -346,15 +606,7 @@ class UnifiedBatchProcessor:
             'processed': 0,
             'successful': 0,
             'failed': 0,
-            'by_platform': {
-                'streamable': 0,
-                'youtube': 0,
-                'vimeo': 0,
-                'wistia': 0,
-                'other': 0,
-                'direct': 0,
-                'none': 0
-            },
+            'by_platform': Counter(),
             'last_processed_id': None,
             'start_time': datetime.now().isoformat(),
             'session_count': 0
@@ -409,34 +661,38 @@ def main():
     parser.add_argument('--report', action='store_true', help='Generate extraction report')
     parser.add_argument('--chrome-port', type=int, default=9222, help='Chrome debugging port')
     parser.add_argument('--db', type=str, default='library_videos.db', help='Database file path')
+    parser.add_argument('--workers', type=int, default=1, help='Concurrent extractions (one Chrome tab each)')
     
     args = parser.parse_args()
     
-    processor = UnifiedBatchProcessor(db_path=args.db, chrome_port=args.chrome_port)
-    
-    if args.reset:
-        processor.reset_progress()
-        return
+    processor = UnifiedBatchProcessor(db_path=args.db, chrome_port=args.chrome_port, workers=args.workers)
     
-    if args.stats:
-        stats = processor.get_processing_stats()
-        print("\n📊 Processing Statistics")
-        print("=" * 40)
-        print(f"Total videos: {stats['total_videos']}")
-        print(f"Videos with content: {stats['videos_with_content']}")
-        print(f"Videos remaining: {stats['videos_remaining']}")
-        print(f"Completion: {stats['completion_percentage']:.1f}%")
-        print("\nPlatform breakdown:")
-        for platform, count in sorted(stats['platform_counts'].items()):
-            print(f"  {platform}: {count}")
-        return
-    
-    if args.report:
-        print(processor.generate_report())
-        return
-    
-    # Process videos
-    results = processor.process_batch(limit=args.limit)
+    try:
+        if args.reset:
+            processor.reset_progress()
+            return
+        
+        if args.stats:
+            stats = processor.get_processing_stats()
+            print("\n📊 Processing Statistics")
+            print("=" * 40)
+            print(f"Total videos: {stats['total_videos']}")
+            print(f"Videos with content: {stats['videos_with_content']}")
+            print(f"Videos remaining: {stats['videos_remaining']}")
+            print(f"Completion: {stats['completion_percentage']:.1f}%")
+            print("\nPlatform breakdown:")
+            for platform, count in sorted(stats['platform_counts'].items()):
+                print(f"  {platform}: {count}")
+            return
+        
+        if args.report:
+            print(processor.generate_report())
+            return
+        
+        # Process videos
+        results = processor.process_batch(limit=args.limit)
+    finally:
+        processor.close()
     
     print(f"\n🎯 Batch processing complete!")
     print(f"✅ Successful: {results['session_successful']}")
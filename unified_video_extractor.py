@@ -4,25 +4,246 @@ Unified Video Extractor - Handles multiple video platforms
 Supports: Streamable, YouTube, Vimeo, Wistia, and generic iframes
 """
 
+import functools
 import json
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 import websocket
-import threading
+import itertools
 import time
 import re
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse, parse_qs
 
+try:
+    import orjson
+    # orjson emits UTF-8 bytes, which websocket-client sends as a text frame as-is
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:  # optional - stdlib json is used instead
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+# Patterns compiled once at import and shared by every extraction
+_YOUTUBE_ID_RE = re.compile(r'^[a-zA-Z0-9_-]{11}$')
+_YOUTUBE_URL_RE = re.compile(r'(?:youtube\.com/(?:watch\?v=|embed/|v/)|youtu\.be/)([a-zA-Z0-9_-]{11})')
+_VIMEO_URL_RE = re.compile(r'(?:player\.)?vimeo\.com/(?:video/)?(\d+)')
+_STREAMABLE_ID_RE = re.compile(r'([a-z0-9]{6,})', re.IGNORECASE)
+# Real Streamable IDs are 6-8 characters and never all digits; longer or
+# numeric matches are asset hashes and timestamps, not worth an API call
+_STREAMABLE_CANDIDATE_RE = re.compile(r'(?![0-9]+$)[a-z0-9]{6,8}', re.IGNORECASE)
+_WISTIA_ID_RE = re.compile(r'([a-z0-9]{10})', re.IGNORECASE)
+# Player and media requests seen on the network, which also catches embeds
+# injected after extraction and manifests that never become a <video> src
+_VIDEO_TRAFFIC_RE = re.compile(
+    r'//(?:www\.)?streamable\.com/(?:[eo]/)?(?P<streamable>[a-z0-9]{6,8})(?:[?#]|$)'
+    r'|(?P<youtube>youtube\.com/embed/[a-zA-Z0-9_-]{11})'
+    r'|(?P<vimeo>player\.vimeo\.com/video/\d+)'
+    r'|fast\.wistia\.(?:com|net)/embed/(?:medias|iframe)/(?P<wistia>[a-z0-9]{10})'
+    r'|(?P<direct>\.(?:m3u8|mpd|mp4)(?:[?#]|$))',
+    re.IGNORECASE
+)
+
+# Collects every platform's candidates in the page; only these findings,
+# not the HTML itself, are returned over the WebSocket
+_EXTRACTION_JS = '''
+    (() => {
+        const findings = {
+            streamable: [],
+            youtube: [],
+            vimeo: [],
+            wistia: [],
+            iframes: [],
+            video_elements: []
+        };
+    
+        // Get full HTML
+        const html = document.documentElement.outerHTML;
+    
+        // 1. Streamable patterns: page links and CDN thumbnails in one pass over the HTML;
+        // only the deduplicated IDs leave the page
+        const streamableIds = new Set();
+        const cdnIds = new Set();
+        for (const match of html.matchAll(/streamable\\.com\\/([a-z0-9]{6,})|cdn-cf-east\\.streamable\\.com\\/image\\/([a-z0-9]+)/gi)) {
+            if (match[1]) {
+                streamableIds.add(match[1]);
+            } else {
+                cdnIds.add(match[2]);
+            }
+        }
+        findings.streamable = [...new Set([...streamableIds, ...cdnIds])];
+    
+        // 2-6. Every element the platforms below look at, gathered in a single
+        // DOM walk; each bucket keeps the order the separate walks produced
+        // and repeats of the same embed are sent only once
+        const youtubeUrls = new Set();
+        const youtubeDataIds = new Set();
+        const vimeoUrls = new Set();
+        const iframeSrcs = new Set();
+        const videoSrcs = new Set();
+        const wistiaElementIds = new Set();
+        const wistiaScriptIds = new Set();
+        const elements = document.querySelectorAll(
+            'iframe, video, script, [data-video-id], [class*="wistia"], [id*="wistia"]'
+        );
+        for (const el of elements) {
+            const tag = el.tagName;
+    
+            // 2-3. YouTube and Vimeo iframes, plus every iframe for unknown platforms (5)
+            if (tag === 'IFRAME') {
+                const src = el.src || el.getAttribute('data-src') || '';
+                if (src.includes('youtube.com') || src.includes('youtu.be')) {
+                    youtubeUrls.add(src);
+                }
+                if (src.includes('vimeo.com') || src.includes('player.vimeo.com')) {
+                    vimeoUrls.add(src);
+                }
+                if (src && !src.includes('recaptcha') && !iframeSrcs.has(src)) {
+                    iframeSrcs.add(src);
+                    findings.iframes.push({
+                        src: src,
+                        id: el.id,
+                        class: el.className
+                    });
+                }
+            }
+    
+            // Also check for YouTube embeds in data attributes
+            const videoId = el.getAttribute('data-video-id');
+            if (videoId && videoId.match(/^[a-zA-Z0-9_-]{11}$/)) {
+                youtubeDataIds.add(videoId);
+            }
+    
+            // 4. Wistia embeds
+            const classes = el.className || '';
+            const id = el.id || '';
+            if (String(classes).includes('wistia') || id.includes('wistia')) {
+                const match = (classes + ' ' + id).match(/wistia_([a-z0-9]{10})/i);
+                if (match) {
+                    wistiaElementIds.add(match[1]);
+                }
+            }
+    
+            // Also check scripts for Wistia
+            if (tag === 'SCRIPT') {
+                const src = el.src || '';
+                const content = el.innerHTML || '';
+                if (src.includes('wistia') || content.includes('wistia')) {
+                    const match = content.match(/[a-z0-9]{10}/);
+                    if (match) wistiaScriptIds.add(match[0]);
+                }
+            }
+    
+            // 6. Video elements
+            if (tag === 'VIDEO') {
+                const src = el.src || '';
+                const sources = Array.from(el.querySelectorAll('source')).map(s => s.src);
+                const key = src + ' ' + sources.join(' ');
+                if ((src || sources.length > 0) && !videoSrcs.has(key)) {
+                    videoSrcs.add(key);
+                    findings.video_elements.push({
+                        src: src,
+                        sources: sources
+                    });
+                }
+            }
+        }
+        findings.youtube = [...new Set([...youtubeUrls, ...youtubeDataIds])];
+        findings.vimeo = [...vimeoUrls];
+        findings.wistia = [...new Set([...wistiaElementIds, ...wistiaScriptIds])];
+    
+        return {
+            findings: findings,
+            pageInfo: {
+                title: document.title,
+                url: window.location.href,
+                htmlSize: html.length
+            }
+        };
+    })()
+'''
+
+# Runs the extraction once the loaded document has a player element (SPAs
+# often inject theirs after the load event), or after 10s regardless. A
+# MutationObserver signals the change, so nothing polls from Python, and the
+# findings come back in the same evaluation
+_READY_EXTRACTION_JS = '''
+    new Promise(resolve => {
+        const ready = () => !!document.querySelector('iframe, video, [class*="wistia"]');
+        const extract = () => ''' + _EXTRACTION_JS.strip() + ''';
+        if (ready()) {
+            resolve(extract());
+            return;
+        }
+        const timer = setTimeout(() => {
+            observer.disconnect();
+            resolve(extract());
+        }, 10000);
+        const observer = new MutationObserver(() => {
+            if (ready()) {
+                observer.disconnect();
+                clearTimeout(timer);
+                resolve(extract());
+            }
+        });
+        observer.observe(document, {childList: true, subtree: true});
+    })
+'''
+
+
+@dataclass(slots=True)
+class VideoInfo:
+    """Video information extracted for one page; unset fields stay None"""
+    streamable_id: Optional[str] = None
+    youtube_id: Optional[str] = None
+    vimeo_id: Optional[str] = None
+    wistia_id: Optional[str] = None
+    other_video_url: Optional[str] = None
+    platform: Optional[str] = None
+    error: Optional[str] = None
+
+
 class UnifiedVideoExtractor:
-    def __init__(self, chrome_port: int = 9222):
-        """Initialize unified extractor with Chrome WebSocket connection"""
+    def __init__(self, chrome_port: int = 9222, session: Optional[requests.Session] = None,
+                 tab_id: Optional[str] = None):
+        """Initialize unified extractor with Chrome WebSocket connection
+        
+        session is reused for Chrome tab discovery and Streamable API checks,
+        so batch callers can share one keep-alive connection pool. tab_id
+        pins the extractor to one tab so several extractors can run side by
+        side; by default an OP tab (or any page tab) is picked.
+        """
         self.chrome_port = chrome_port
+        self.tab_id = tab_id
+        if session is None:
+            # Keep-alive pools for the Chrome debug port and the Streamable API
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self._session = session
         self.cookies = self._load_cookies()
         print(f"✅ Loaded {len(self.cookies)} authentication cookies")
+        
+        # One DevTools connection to the tab, opened on first use and kept
+        # across extractions; cookies are set once per connection
+        self._ws = None
+        self._command_ids = itertools.count(1)
+        
+        # (loaderId, url) of video responses seen since the last navigation
+        self._video_traffic: List[Tuple[str, str]] = []
+        
+        # Streamable API answers per ID, kept for the extractor's lifetime
+        self._streamable_cache: Dict[str, bool] = {}
     
-    def _load_cookies(self) -> List[dict]:
-        """Load authentication cookies from file"""
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _load_cookies() -> List[dict]:
+        """Load authentication cookies from file (read once per process, shared by all extractors)"""
         cookie_paths = [
             "cookies.json",
             "../cookies.json", 
@@ -31,284 +252,275 @@ class UnifiedVideoExtractor:
         
         for path in cookie_paths:
             if Path(path).exists():
-                with open(path, 'r') as f:
-                    return json.load(f)
+                return _json_loads(Path(path).read_bytes())
         return []
     
-    def extract_video_info(self, url: str) -> Dict[str, Optional[str]]:
-        """Extract video information from any supported platform"""
+    @staticmethod
+    def list_tabs(chrome_port: int = 9222, session=None) -> List[dict]:
+        """List the page tabs on the Chrome debug port, OP tabs first"""
+        response = (session or requests).get(f'http://localhost:{chrome_port}/json/list', timeout=5)
+        tabs = [tab for tab in response.json()
+                if tab.get('type', 'page') == 'page'
+                and not tab.get('url', '').startswith(('chrome-extension:', 'chrome:', 'devtools:'))]
+        return sorted(tabs, key=lambda tab: 'objectivepersonality.com' not in tab.get('url', ''))
+    
+    @staticmethod
+    def open_tab(chrome_port: int = 9222, url: str = 'about:blank', session=None) -> dict:
+        """Open a new tab and return its /json entry"""
+        http = session or requests
+        endpoint = f'http://localhost:{chrome_port}/json/new?{url}'
+        response = http.put(endpoint, timeout=5)
+        if response.status_code == 405:  # Chrome before 111 only accepts GET
+            response = http.get(endpoint, timeout=5)
+        response.raise_for_status()
+        return response.json()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def connect(self):
+        """Open the DevTools WebSocket to a usable tab and authenticate it once"""
+        if self._ws is not None:
+            return
+        
+        # Get Chrome tabs, OP tabs first (the pinned one if set)
+        op_tab = None
+        for tab in self.list_tabs(self.chrome_port, session=self._session):
+            if self.tab_id is None or tab.get('id') == self.tab_id:
+                op_tab = tab
+                break
+        
+        if not op_tab:
+            raise RuntimeError("No usable Chrome tabs available")
+        
+        if 'objectivepersonality.com' in op_tab.get('url', ''):
+            print(f"✅ Found OP tab: {op_tab.get('id')}")
+        else:
+            print(f"⚠️  Using non-OP tab: {op_tab.get('id')}")
+        
+        self._ws = websocket.create_connection(op_tab.get('webSocketDebuggerUrl'), timeout=45)
+        print("🔗 WebSocket connected")
+        try:
+            # The setup commands are sent back to back and acknowledged
+            # together; Chrome runs them in order, so nothing waits per command
+            self._call_all([
+                ('Page.enable', None),
+                # Page.lifecycleEvent tells which navigation a load belongs to
+                ('Page.setLifecycleEventsEnabled', {'enabled': True}),
+                ('Network.enable', None),
+                # Set all cookies in one command; they stay set for every later
+                # navigation on this connection
+                ('Network.setCookies', {'cookies': [
+                    {
+                        'name': cookie['name'],
+                        'value': cookie['value'],
+                        'domain': cookie.get('domain', '.objectivepersonality.com'),
+                        'path': cookie.get('path', '/'),
+                        'secure': cookie.get('secure', False),
+                        'httpOnly': cookie.get('httpOnly', False)
+                    }
+                    for cookie in self.cookies[:15]
+                ]}),
+            ], time.monotonic() + 45)
+            print("✅ Page and Network domains enabled, fresh cookies set")
+        except Exception:
+            self.close()
+            raise
+    
+    def close(self):
+        """Close the DevTools WebSocket; the next extraction reconnects"""
+        if self._ws is not None:
+            self._ws.close()
+            self._ws = None
+    
+    def _wait_for(self, matches, deadline: float) -> Optional[dict]:
+        """Read CDP messages until one satisfies matches(); None once deadline passes"""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self._ws.settimeout(remaining)
+            try:
+                data = _json_loads(self._ws.recv())
+            except websocket.WebSocketTimeoutException:
+                return None
+            if data.get('method') == 'Network.responseReceived':
+                params = data['params']
+                if _VIDEO_TRAFFIC_RE.search(params['response'].get('url', '')):
+                    self._video_traffic.append((params.get('loaderId'), params['response']['url']))
+            if matches(data):
+                return data
+    
+    def _send(self, method: str, params: Optional[dict]) -> int:
+        """Send a CDP command without waiting and return its id"""
+        # Ids keep increasing across extractions, so a late reply to an
+        # earlier page's command is never mistaken for the current one
+        command_id = next(self._command_ids)
+        self._ws.send(_json_dumps({'id': command_id, 'method': method, 'params': params or {}}))
+        return command_id
+    
+    def _call(self, method: str, params: Optional[dict], deadline: float) -> dict:
+        """Send a CDP command and block until its response arrives"""
+        return self._call_all([(method, params)], deadline)[0]
+    
+    def _call_all(self, commands: List[Tuple[str, Optional[dict]]], deadline: float) -> List[dict]:
+        """Send several CDP commands at once, then block until every response arrives"""
+        pending = {self._send(method, params): method for method, params in commands}
+        responses = {}
+        while pending:
+            response = self._wait_for(lambda data: data.get('id') in pending, deadline)
+            if response is None:
+                raise websocket.WebSocketTimeoutException(
+                    f"Timed out waiting for {', '.join(pending.values())}")
+            pending.pop(response['id'])
+            responses[response['id']] = response
+        return [responses[command_id] for command_id in sorted(responses)]
+    
+    def extract_video_info(self, url: str, multi: bool = False) -> VideoInfo:
+        """Extract video information from any supported platform
+        
+        Only the highest-priority platform found is returned unless multi
+        is set, in which case IDs for every platform on the page are kept.
+        """
         print(f"🎬 Processing: {url}")
         print(f"🔗 Connecting to Chrome on port {self.chrome_port}")
         
-        result = {
-            'streamable_id': None,
-            'youtube_id': None,
-            'vimeo_id': None,
-            'wistia_id': None,
-            'other_video_url': None,
-            'platform': None,
-            'error': None
-        }
+        result = VideoInfo()
         
         try:
-            # Get Chrome tabs
-            response = requests.get(f'http://localhost:{self.chrome_port}/json/list', timeout=5)
-            tabs = response.json()
-            
-            # Find OP tab
-            op_tab = None
-            for tab in tabs:
-                if 'objectivepersonality.com' in tab.get('url', ''):
-                    op_tab = tab
-                    print(f"✅ Found OP tab: {tab.get('id')}")
-                    break
-            
-            if not op_tab:
-                # Use any available tab
-                for tab in tabs:
-                    if not tab.get('url', '').startswith(('chrome-extension:', 'chrome:', 'devtools:')):
-                        op_tab = tab
-                        print(f"⚠️  Using non-OP tab: {tab.get('id')}")
-                        break
-            
-            if not op_tab:
-                result['error'] = "No usable Chrome tabs available"
-                return result
-            
-            ws_url = op_tab.get('webSocketDebuggerUrl')
-            ws_result = {'html': None, 'done': False, 'error': None}
-            
-            def on_message(ws, message):
-                try:
-                    data = json.loads(message)
-                    
-                    if data.get('id') == 1:  # Page enable
-                        print("✅ Page domain enabled")
-                        ws.send(json.dumps({'id': 2, 'method': 'Network.enable', 'params': {}}))
-                        
-                    elif data.get('id') == 2:  # Network enable
-                        print("✅ Network domain enabled, setting fresh cookies...")
-                        # Set cookies
-                        for i, cookie in enumerate(self.cookies[:15]):
-                            command = {
-                                'id': 100 + i,
-                                'method': 'Network.setCookie',
-                                'params': {
-                                    'name': cookie['name'],
-                                    'value': cookie['value'],
-                                    'domain': cookie.get('domain', '.objectivepersonality.com'),
-                                    'path': cookie.get('path', '/'),
-                                    'secure': cookie.get('secure', False),
-                                    'httpOnly': cookie.get('httpOnly', False)
-                                }
-                            }
-                            ws.send(json.dumps(command))
-                        
-                        time.sleep(2)
-                        ws.send(json.dumps({'id': 200, 'method': 'Page.navigate', 'params': {'url': url}}))
-                    
-                    elif data.get('id') == 200:  # Navigation complete
-                        print("📍 Page navigated, waiting for content...")
-                        time.sleep(15)  # Wait for JavaScript
-                        
-                        # Extract all video information
-                        extraction_script = '''
-                        (() => {
-                            const findings = {
-                                streamable: [],
-                                youtube: [],
-                                vimeo: [],
-                                wistia: [],
-                                iframes: [],
-                                video_elements: []
-                            };
-                            
-                            // Get full HTML
-                            const html = document.documentElement.outerHTML;
-                            
-                            // 1. Streamable patterns
-                            const streamableMatches = html.match(/streamable\\.com\\/([a-z0-9]{6,})/gi) || [];
-                            const cdnMatches = html.match(/cdn-cf-east\\.streamable\\.com\\/image\\/([a-z0-9]+)/gi) || [];
-                            findings.streamable = [...streamableMatches, ...cdnMatches];
-                            
-                            // 2. YouTube
-                            document.querySelectorAll('iframe').forEach(iframe => {
-                                const src = iframe.src || iframe.getAttribute('data-src') || '';
-                                if (src.includes('youtube.com') || src.includes('youtu.be')) {
-                                    findings.youtube.push(src);
-                                }
-                            });
-                            
-                            // Also check for YouTube embeds in data attributes
-                            document.querySelectorAll('[data-video-id]').forEach(el => {
-                                const videoId = el.getAttribute('data-video-id');
-                                if (videoId && videoId.match(/^[a-zA-Z0-9_-]{11}$/)) {
-                                    findings.youtube.push(videoId);
-                                }
-                            });
-                            
-                            // 3. Vimeo
-                            document.querySelectorAll('iframe').forEach(iframe => {
-                                const src = iframe.src || iframe.getAttribute('data-src') || '';
-                                if (src.includes('vimeo.com') || src.includes('player.vimeo.com')) {
-                                    findings.vimeo.push(src);
-                                }
-                            });
-                            
-                            // 4. Wistia
-                            // Look for Wistia embeds and scripts
-                            const wistiaElements = document.querySelectorAll('[class*="wistia"], [id*="wistia"]');
-                            wistiaElements.forEach(el => {
-                                const classes = el.className || '';
-                                const id = el.id || '';
-                                const match = (classes + ' ' + id).match(/wistia_[a-z0-9]{10}/i);
-                                if (match) {
-                                    findings.wistia.push(match[0]);
-                                }
-                            });
-                            
-                            // Also check scripts for Wistia
-                            document.querySelectorAll('script').forEach(script => {
-                                const src = script.src || '';
-                                const content = script.innerHTML || '';
-                                if (src.includes('wistia') || content.includes('wistia')) {
-                                    const match = content.match(/[a-z0-9]{10}/);
-                                    if (match) findings.wistia.push(match[0]);
-                                }
-                            });
-                            
-                            // 5. All iframes (for unknown platforms)
-                            document.querySelectorAll('iframe').forEach(iframe => {
-                                const src = iframe.src || iframe.getAttribute('data-src') || '';
-                                if (src && !src.includes('recaptcha')) {
-                                    findings.iframes.push({
-                                        src: src,
-                                        id: iframe.id,
-                                        class: iframe.className
-                                    });
-                                }
-                            });
-                            
-                            // 6. Video elements
-                            document.querySelectorAll('video').forEach(video => {
-                                const src = video.src || '';
-                                const sources = Array.from(video.querySelectorAll('source')).map(s => s.src);
-                                if (src || sources.length > 0) {
-                                    findings.video_elements.push({
-                                        src: src,
-                                        sources: sources
-                                    });
-                                }
-                            });
-                            
-                            return {
-                                findings: findings,
-                                pageInfo: {
-                                    title: document.title,
-                                    url: window.location.href,
-                                    htmlSize: html.length
-                                }
-                            };
-                        })()
-                        ''';
-                        
-                        ws.send(json.dumps({
-                            'id': 300,
-                            'method': 'Runtime.evaluate',
-                            'params': {
-                                'expression': extraction_script,
-                                'returnByValue': True
-                            }
-                        }))
-                    
-                    elif data.get('id') == 300:  # Extraction complete
-                        result_data = data.get('result', {})
-                        if 'result' in result_data and 'value' in result_data['result']:
-                            ws_result['html'] = result_data['result']['value']
-                            print(f"✅ Got extraction results")
-                        
-                        ws_result['done'] = True
-                        ws.close()
-                        
-                except Exception as e:
-                    ws_result['error'] = str(e)
-                    ws_result['done'] = True
-                    ws.close()
-            
-            def on_error(ws, error):
-                ws_result['error'] = str(error)
-                ws_result['done'] = True
-            
-            def on_open(ws):
-                print("🔗 WebSocket connected")
-                ws.send(json.dumps({'id': 1, 'method': 'Page.enable', 'params': {}}))
-            
-            # Connect
-            ws = websocket.WebSocketApp(ws_url, on_open=on_open, on_message=on_message, on_error=on_error)
-            ws_thread = threading.Thread(target=ws.run_forever)
-            ws_thread.daemon = True
-            ws_thread.start()
-            
-            # Wait
-            timeout = 45
-            while not ws_result['done'] and timeout > 0:
-                time.sleep(0.5)
-                timeout -= 0.5
-            
-            if ws_result['error']:
-                result['error'] = ws_result['error']
-                return result
+            reused = self._ws is not None
+            try:
+                self.connect()
+                page = self._extract_page(url)
+            except (websocket.WebSocketConnectionClosedException, ConnectionError):
+                # A kept connection goes stale when the tab is closed or
+                # Chrome restarts - reconnect once
+                self.close()
+                if not reused:
+                    raise
+                print("♻️  DevTools connection lost, reconnecting...")
+                self.connect()
+                page = self._extract_page(url)
             
             # Process extraction results
-            if ws_result['html']:
-                findings = ws_result['html'].get('findings', {})
-                page_info = ws_result['html'].get('pageInfo', {})
+            if page:
+                findings = page.get('findings', {})
+                page_info = page.get('pageInfo', {})
                 
                 print(f"📄 Page: {page_info.get('title', 'Unknown')}")
                 print(f"📏 HTML Size: {page_info.get('htmlSize', 0):,} bytes")
                 
                 # Extract IDs from each platform
-                result.update(self._process_findings(findings))
+                result = self._process_findings(findings, multi)
             
             return result
             
         except Exception as e:
-            result['error'] = str(e)
+            # Unread replies may still be queued; start the next URL fresh
+            self.close()
+            result.error = str(e)
             return result
     
-    def _process_findings(self, findings: Dict) -> Dict[str, Optional[str]]:
-        """Process findings and extract video IDs"""
-        result = {
-            'streamable_id': None,
-            'youtube_id': None,
-            'vimeo_id': None,
-            'wistia_id': None,
-            'other_video_url': None,
-            'platform': None
-        }
+    def _extract_page(self, url: str) -> Optional[dict]:
+        """Navigate the connected tab to url and run the extraction script"""
+        deadline = time.monotonic() + 45
+        
+        self._video_traffic.clear()
+        navigated = self._call('Page.navigate', {'url': url}, deadline)
+        loader_id = navigated.get('result', {}).get('loaderId')
+        print("📍 Page navigated, waiting for load event...")
+        
+        # Extract as soon as this navigation's load event fires, but never
+        # wait longer than the old fixed 15s delay
+        loaded = None
+        if loader_id:
+            loaded = self._wait_for(
+                lambda data: (data.get('method') == 'Page.lifecycleEvent'
+                              and data['params'].get('name') == 'load'
+                              and data['params'].get('loaderId') == loader_id),
+                min(deadline, time.monotonic() + 15)
+            )
+        
+        # Extract all video information; once loaded, the page itself waits
+        # for the video embeds and answers as soon as they appear
+        if loaded:
+            print("📄 Page loaded, waiting for video embeds...")
+            params = {'expression': _READY_EXTRACTION_JS, 'awaitPromise': True, 'returnByValue': True}
+        else:
+            params = {'expression': _EXTRACTION_JS, 'returnByValue': True}
+        response = self._call('Runtime.evaluate', params, deadline)
+        result_data = response.get('result', {})
+        if 'result' in result_data and 'value' in result_data['result']:
+            print(f"✅ Got extraction results")
+            page = result_data['result']['value']
+            self._add_video_traffic(page.get('findings', {}), loader_id)
+            return page
+        return None
+    
+    def _add_video_traffic(self, findings: Dict, loader_id: Optional[str]):
+        """Append video URLs seen on the network to the DOM findings
+        
+        They go after the DOM candidates, so an embed found in the page
+        still wins over one only seen loading.
+        """
+        for traffic_loader_id, url in self._video_traffic:
+            if loader_id and traffic_loader_id != loader_id:
+                continue
+            match = _VIDEO_TRAFFIC_RE.search(url)
+            if match.group('streamable'):
+                bucket, value = 'streamable', match.group('streamable')
+            elif match.group('youtube'):
+                bucket, value = 'youtube', url
+            elif match.group('vimeo'):
+                bucket, value = 'vimeo', url
+            elif match.group('wistia'):
+                bucket, value = 'wistia', match.group('wistia')
+            else:
+                bucket, value = 'video_elements', {'src': url, 'sources': []}
+            
+            values = findings.setdefault(bucket, [])
+            if value not in values:
+                values.append(value)
+        self._video_traffic.clear()
+    
+    def _process_findings(self, findings: Dict, multi: bool = False) -> VideoInfo:
+        """Process findings and extract video IDs
+        
+        Platforms are checked in priority order and the first one found is
+        returned; with multi=True every platform's ID is collected.
+        """
+        result = VideoInfo()
         
         # 1. Streamable
         if findings.get('streamable'):
+            candidates = []
             for item in findings['streamable']:
-                match = re.search(r'([a-z0-9]{6,})', item, re.IGNORECASE)
-                if match:
-                    streamable_id = match.group(1)
-                    if len(streamable_id) >= 6:
-                        if self._validate_streamable_id(streamable_id):
-                            result['streamable_id'] = streamable_id
-                            result['platform'] = 'streamable'
-                            print(f"✅ Found Streamable: {streamable_id}")
-                            break
+                match = _STREAMABLE_ID_RE.search(item)
+                if match and _STREAMABLE_CANDIDATE_RE.fullmatch(match.group(1)):
+                    candidates.append(match.group(1))
+            
+            streamable_id = self._first_valid_streamable_id(candidates)
+            if streamable_id:
+                result.streamable_id = streamable_id
+                result.platform = 'streamable'
+                print(f"✅ Found Streamable: {streamable_id}")
+                if not multi:
+                    return result
         
         # 2. YouTube
         if findings.get('youtube'):
             for url_or_id in findings['youtube']:
                 youtube_id = self._extract_youtube_id(url_or_id)
                 if youtube_id:
-                    result['youtube_id'] = youtube_id
-                    if not result['platform']:
-                        result['platform'] = 'youtube'
+                    result.youtube_id = youtube_id
+                    if not result.platform:
+                        result.platform = 'youtube'
                     print(f"✅ Found YouTube: {youtube_id}")
+                    if not multi:
+                        return result
                     break
         
         # 3. Vimeo
@@ -316,26 +528,30 @@ class UnifiedVideoExtractor:
             for url in findings['vimeo']:
                 vimeo_id = self._extract_vimeo_id(url)
                 if vimeo_id:
-                    result['vimeo_id'] = vimeo_id
-                    if not result['platform']:
-                        result['platform'] = 'vimeo'
+                    result.vimeo_id = vimeo_id
+                    if not result.platform:
+                        result.platform = 'vimeo'
                     print(f"✅ Found Vimeo: {vimeo_id}")
+                    if not multi:
+                        return result
                     break
         
         # 4. Wistia
         if findings.get('wistia'):
             for item in findings['wistia']:
-                match = re.search(r'([a-z0-9]{10})', item, re.IGNORECASE)
+                match = _WISTIA_ID_RE.search(item)
                 if match:
                     wistia_id = match.group(1)
-                    result['wistia_id'] = wistia_id
-                    if not result['platform']:
-                        result['platform'] = 'wistia'
+                    result.wistia_id = wistia_id
+                    if not result.platform:
+                        result.platform = 'wistia'
                     print(f"✅ Found Wistia: {wistia_id}")
+                    if not multi:
+                        return result
                     break
         
         # 5. Other video sources
-        if not result['platform']:
+        if not result.platform:
             # Check iframes
             if findings.get('iframes'):
                 for iframe in findings['iframes']:
@@ -347,22 +563,22 @@ class UnifiedVideoExtractor:
                         # Check for video-related keywords or patterns
                         video_indicators = ['video', 'player', 'embed', 'media', 'stream', 'watch', 'herokuapp.com/worker']
                         if any(indicator in src.lower() for indicator in video_indicators) or 'w-gcb-app' in src:
-                            result['other_video_url'] = src
-                            result['platform'] = 'other'
+                            result.other_video_url = src
+                            result.platform = 'other'
                             print(f"✅ Found other video iframe: {src[:100]}...")
                             break
             
             # Check video elements
-            if not result['platform'] and findings.get('video_elements'):
+            if not result.platform and findings.get('video_elements'):
                 for video in findings['video_elements']:
                     src = video.get('src') or (video.get('sources', [])[0] if video.get('sources') else None)
                     if src:
-                        result['other_video_url'] = src
-                        result['platform'] = 'direct'
+                        result.other_video_url = src
+                        result.platform = 'direct'
                         print(f"✅ Found direct video: {src}")
                         break
         
-        if not result['platform']:
+        if not result.platform:
             print("❌ No video content found on page")
         
         return result
@@ -370,47 +586,69 @@ class UnifiedVideoExtractor:
     def _extract_youtube_id(self, url_or_id: str) -> Optional[str]:
         """Extract YouTube video ID from URL or return ID if already extracted"""
         # If it's already an ID
-        if re.match(r'^[a-zA-Z0-9_-]{11}$', url_or_id):
+        if _YOUTUBE_ID_RE.match(url_or_id):
             return url_or_id
         
-        # Extract from URL
-        patterns = [
-            r'youtube\.com/watch\?v=([a-zA-Z0-9_-]{11})',
-            r'youtube\.com/embed/([a-zA-Z0-9_-]{11})',
-            r'youtu\.be/([a-zA-Z0-9_-]{11})',
-            r'youtube\.com/v/([a-zA-Z0-9_-]{11})'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url_or_id)
-            if match:
-                return match.group(1)
-        
-        return None
+        # Extract from URL (watch, embed, /v/ and youtu.be forms)
+        match = _YOUTUBE_URL_RE.search(url_or_id)
+        return match.group(1) if match else None
     
     def _extract_vimeo_id(self, url: str) -> Optional[str]:
         """Extract Vimeo video ID from URL"""
-        patterns = [
-            r'vimeo\.com/(\d+)',
-            r'player\.vimeo\.com/video/(\d+)'
-        ]
+        match = _VIMEO_URL_RE.search(url)
+        return match.group(1) if match else None
+    
+    def _validate_streamable_id(self, streamable_id: str) -> bool:
+        """Validate Streamable ID using API (each ID is checked only once)"""
+        if streamable_id in self._streamable_cache:
+            return self._streamable_cache[streamable_id]
         
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
+        valid = self._check_streamable_id(streamable_id)
+        if valid is None:
+            # Network errors are not cached, so the ID is retried next time
+            return False
+        self._streamable_cache[streamable_id] = valid
+        return valid
+    
+    def _first_valid_streamable_id(self, streamable_ids: List[str], window: int = 4) -> Optional[str]:
+        """Return the first valid Streamable ID in order, stopping at the first hit
         
-        return None
+        Uncached IDs are checked up to `window` at a time, so at most a few
+        API calls are spent past the winning candidate.
+        """
+        if sum(streamable_id not in self._streamable_cache for streamable_id in streamable_ids) < 2:
+            return next((streamable_id for streamable_id in streamable_ids
+                         if self._validate_streamable_id(streamable_id)), None)
+        
+        executor = ThreadPoolExecutor(max_workers=window)
+        in_flight = deque()
+        try:
+            for streamable_id in streamable_ids:
+                in_flight.append((streamable_id, executor.submit(self._validate_streamable_id, streamable_id)))
+                if len(in_flight) == window:
+                    streamable_id, future = in_flight.popleft()
+                    if future.result():
+                        return streamable_id
+            
+            while in_flight:
+                streamable_id, future = in_flight.popleft()
+                if future.result():
+                    return streamable_id
+            return None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
     
-    def _validate_streamable_id(self, streamable_id: str) -> bool:
-        """Validate Streamable ID using API"""
+    def _check_streamable_id(self, streamable_id: str) -> Optional[bool]:
+        """Ask the Streamable API whether an ID exists; None if the request failed"""
         try:
-            response = requests.get(f'https://api.streamable.com/videos/{streamable_id}', timeout=5)
-            if response.status_code == 200:
-                return True
+            # Only the status code matters, so skip the JSON body
+            url = f'https://api.streamable.com/videos/{streamable_id}'
+            response = self._session.head(url, timeout=5)
+            if response.status_code == 405:
+                response = self._session.get(url, timeout=5)
+            return response.status_code == 200
         except:
-            pass
-        return False
+            return None
 
 
 def main():
@@ -425,27 +663,27 @@ def main():
     print("🚀 Starting Unified Video Extractor")
     print("=" * 60)
     
-    extractor = UnifiedVideoExtractor(chrome_port=args.chrome_port)
-    result = extractor.extract_video_info(args.url)
+    with UnifiedVideoExtractor(chrome_port=args.chrome_port) as extractor:
+        result = extractor.extract_video_info(args.url)
     
     print("=" * 60)
     print("📊 EXTRACTION RESULTS:")
     print("=" * 60)
     
-    if result['error']:
-        print(f"❌ Error: {result['error']}")
+    if result.error:
+        print(f"❌ Error: {result.error}")
     else:
-        print(f"🎯 Platform: {result['platform'] or 'None'}")
-        if result['streamable_id']:
-            print(f"   Streamable ID: {result['streamable_id']}")
-        if result['youtube_id']:
-            print(f"   YouTube ID: {result['youtube_id']}")
-        if result['vimeo_id']:
-            print(f"   Vimeo ID: {result['vimeo_id']}")
-        if result['wistia_id']:
-            print(f"   Wistia ID: {result['wistia_id']}")
-        if result['other_video_url']:
-            print(f"   Other Video: {result['other_video_url'][:80]}...")
+        print(f"🎯 Platform: {result.platform or 'None'}")
+        if result.streamable_id:
+            print(f"   Streamable ID: {result.streamable_id}")
+        if result.youtube_id:
+            print(f"   YouTube ID: {result.youtube_id}")
+        if result.vimeo_id:
+            print(f"   Vimeo ID: {result.vimeo_id}")
+        if result.wistia_id:
+            print(f"   Wistia ID: {result.wistia_id}")
+        if result.other_video_url:
+            print(f"   Other Video: {result.other_video_url[:80]}...")
     
     return result
 
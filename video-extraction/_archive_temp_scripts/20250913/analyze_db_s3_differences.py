@@ -11,13 +11,33 @@ It identifies discrepancies, orphaned files, missing files, and data integrity i
 
 import sqlite3
 import boto3
+from botocore.config import Config
+import gzip
+import io
 import json
 import logging
-from datetime import datetime
-from typing import Dict, List, Set, Tuple, Optional
-from collections import defaultdict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Set, Tuple, Optional
+from collections import Counter
+from dataclasses import dataclass
+from itertools import islice
 import re
 
+try:
+    import orjson
+
+    def _dump_json(data) -> bytes:
+        # Datetimes go through default=str, matching the stdlib output
+        return orjson.dumps(data, default=str,
+                            option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATETIME)
+except ImportError:  # optional - stdlib json is used instead
+    def _dump_json(data) -> bytes:
+        return json.dumps(data, indent=2, default=str).encode()
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,100 +45,230 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Concurrent listings of per-video prefixes, kept well under S3's request rate limits
+LIST_WORKERS = 16
+# ListObjectsV2 requests per second across all workers (S3 allows ~5500 GETs
+# per second per prefix before answering 503 SlowDown)
+LIST_REQUESTS_PER_SECOND = 3000
+
+# Local copy of the S3 inventory. Video directories are write-once, so within
+# CACHE_MAX_AGE only directories missing from the cache are listed; older
+# caches get a full rescan, which also picks up deletions inside directories
+S3_CACHE_PATH = Path.home() / ".cache" / "analyzer" / "s3_videos.db"
+CACHE_MAX_AGE = timedelta(hours=24)
+
+# Rows fetched from the videos table per batch
+FETCH_BATCH_SIZE = 5000
+
+# Database columns loaded for the analysis, in SELECT order
+DB_COLUMNS = (
+    'id', 'title', 's3_key', 's3_bucket', 'streamable_id',
+    'video_url', 'file_size', 's3_upload_date',
+    'transcript_s3_key', 'transcript_s3_url',
+    'transcription_status', 'transcription_service'
+)
+
+# s3_key values of the form videos/{uuid}/{filename}; the UUID is substr(s3_key, 8, 36)
+UUID_KEY_GLOB = 'videos/' + '[0-9a-f-]' * 36 + '/*'
+
+# Report separators, written once per section
+RULE = "=" * 80 + "\n"
+SECTION_RULE = "-" * 40 + "\n"
+
+# Filename words that mark test uploads
+TEST_FILE_WORDS = ('test', 'sample', 'demo')
+
+
+class S3Entry(NamedTuple):
+    """One video file in S3 (a tuple, so large inventories stay compact)"""
+    s3_key: str
+    uuid: str
+    filename: str
+    size: int
+    last_modified: datetime
+    
+    @property
+    def size_mb(self) -> float:
+        return round(self.size / (1024 * 1024), 2)
+    
+    def to_dict(self) -> Dict:
+        """Plain dict for JSON output, including size_mb"""
+        return {**self._asdict(), 'size_mb': self.size_mb}
+
+
+class TokenBucket:
+    """Lets requests through at rate per second, with bursts up to capacity
+    
+    Tokens are reserved under the lock and slept for outside it, so
+    waiting callers are served in order without holding each other up.
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Block until a token is available; returns seconds waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+@dataclass
+class KeyComparison:
+    """Database S3 keys compared with the S3 inventory, in one pass"""
+    db_keys_not_in_s3: List[str]   # Database claims these exist but they don't
+    s3_keys_not_in_db: List[str]   # S3 has these but DB doesn't know about them
+    matching_keys: List[str]       # Perfect matches
+    ready_for_transcription: List[Tuple[str, str, str]]  # (id, title, s3_key): in S3, no transcript
+
 
 class DatabaseS3Analyzer:
     """Analyze differences between database records and S3 files"""
     
     def __init__(self, db_path: str = "../../library_scrape/library_videos.db", 
-                 bucket_name: str = "xenodx-video-archive", profile: str = "zenex"):
+                 bucket_name: str = "xenodx-video-archive", profile: str = "zenex",
+                 cache_path: Optional[Path] = S3_CACHE_PATH):
         self.db_path = db_path
         self.bucket_name = bucket_name
+        self.cache_path = cache_path  # None always lists the whole bucket
         
-        # Initialize S3 client
+        # Initialize S3 client (thread-safe, shared by the listing workers);
+        # adaptive retries back off on any SlowDown that still gets through
         session = boto3.Session(profile_name=profile)
-        self.s3_client = session.client('s3')
-        
-        # Data structures to hold analysis results
-        self.db_videos = {}
+        self.s3_client = session.client('s3', config=Config(
+            max_pool_connections=64,
+            retries={'mode': 'adaptive', 'max_attempts': 5}
+        ))
+        self.list_limiter = TokenBucket(LIST_REQUESTS_PER_SECOND)
+        
+        # Data structures to hold analysis results; database videos are
+        # stored by column (one list per column, rows aligned by index)
+        self.db_videos = {column: [] for column in DB_COLUMNS}
         self.s3_videos = {}
         self.analysis_results = {}
     
-    def get_database_videos(self) -> Dict[str, Dict]:
-        """Extract all video records from database"""
+    def get_database_videos(self) -> Dict[str, List]:
+        """Extract all video records from database, as one list per column"""
         logger.info("🔍 Analyzing database video records...")
         
         try:
             with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+                if logger.isEnabledFor(logging.DEBUG):
+                    conn.set_trace_callback(logger.debug)
                 cursor = conn.cursor()
                 
                 # Get all videos with their S3 information
-                cursor.execute("""
-                    SELECT id, title, s3_key, s3_bucket, streamable_id, 
-                           video_url, file_size, s3_upload_date,
-                           transcript_s3_key, transcript_s3_url,
-                           transcription_status, transcription_service
+                cursor.execute(f"""
+                    SELECT {', '.join(DB_COLUMNS)}
                     FROM videos
                     ORDER BY id
                 """)
                 
-                videos = {}
-                for row in cursor.fetchall():
-                    video_dict = dict(row)
-                    videos[video_dict['id']] = video_dict
+                # Transpose the plain row tuples into columns batch by batch, so
+                # each analysis pass scans flat sequences instead of a dict per
+                # row and the full result set is never held as rows
+                videos = {column: [] for column in DB_COLUMNS}
+                columns = list(videos.values())
+                for rows in iter(lambda: cursor.fetchmany(FETCH_BATCH_SIZE), []):
+                    for column, values in zip(columns, zip(*rows)):
+                        column.extend(values)
                 
-                logger.info(f"✅ Found {len(videos)} video records in database")
+                logger.info(f"✅ Found {len(videos['id'])} video records in database")
                 return videos
                 
         except Exception as e:
             logger.error(f"❌ Database error: {e}")
-            return {}
+            return {column: [] for column in DB_COLUMNS}
     
-    def get_s3_videos(self) -> Dict[str, Dict]:
+    def _list_pages(self, **kwargs) -> Iterator[Dict]:
+        """ListObjectsV2 pages for the bucket, each request paced by the shared token bucket"""
+        pages = iter(self.s3_client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket_name, **kwargs))
+        while True:
+            # The paginator sends the next request when advanced
+            self.list_limiter.acquire()
+            page = next(pages, None)
+            if page is None:
+                return
+            yield page
+    
+    def _list_prefix(self, prefix: str) -> Dict[str, S3Entry]:
+        """List the video files under one videos/{uuid}/ prefix"""
+        videos = {}
+        
+        for page in self._list_pages(Prefix=prefix, PaginationConfig={'PageSize': 1000}):
+            if 'Contents' not in page:
+                continue
+                
+            # Only Key, Size and LastModified are read from each object
+            for obj in page['Contents']:
+                key = obj['Key']
+                
+                # Skip directories
+                if key.endswith('/'):
+                    continue
+                
+                # Extract video info from S3 key
+                # Format: videos/{uuid}/{filename}
+                parts = key.split('/')
+                if len(parts) >= 3:
+                    uuid = parts[1]
+                    filename = '/'.join(parts[2:])  # Handle nested paths
+                    
+                    videos[key] = S3Entry(key, uuid, filename, obj['Size'], obj['LastModified'])
+        
+        return videos
+    
+    def get_s3_videos(self) -> Dict[str, S3Entry]:
         """Extract all video files from S3"""
         logger.info("🔍 Analyzing S3 video files...")
         
         try:
-            # List all video files in S3
-            paginator = self.s3_client.get_paginator('list_objects_v2')
+            # One delimited listing finds the per-video directories; each is
+            # then listed on its own worker instead of paging the whole
+            # bucket serially
+            prefixes = []
+            for page in self._list_pages(Prefix='videos/', Delimiter='/'):
+                prefixes.extend(common['Prefix'] for common in page.get('CommonPrefixes', []))
+            
+            # Directories already in a fresh cache are reused, not re-listed
+            cached, listed_at = self._load_s3_cache()
+            if listed_at and datetime.now() - listed_at < CACHE_MAX_AGE:
+                to_list = [prefix for prefix in prefixes if prefix not in cached]
+                logger.info(f"♻️  Reusing {len(prefixes) - len(to_list)} cached directories, "
+                            f"listing {len(to_list)} new ones")
+            else:
+                to_list = prefixes
+                listed_at = datetime.now()
+            
+            listed = {}
+            if to_list:
+                with ThreadPoolExecutor(max_workers=min(LIST_WORKERS, len(to_list))) as executor:
+                    listed = dict(zip(to_list, executor.map(self._list_prefix, to_list)))
             
+            # Prefixes never overlap, so the results merge without conflicts;
+            # directories that are gone from S3 drop out of the cache here
+            by_prefix = {prefix: listed[prefix] if prefix in listed else cached[prefix] for prefix in prefixes}
             videos = {}
-            total_size = 0
-            file_count = 0
+            for prefix_videos in by_prefix.values():
+                videos.update(prefix_videos)
             
-            for page in paginator.paginate(Bucket=self.bucket_name, Prefix='videos/'):
-                if 'Contents' not in page:
-                    continue
-                    
-                for obj in page['Contents']:
-                    key = obj['Key']
-                    size = obj['Size']
-                    last_modified = obj['LastModified']
-                    
-                    # Skip directories
-                    if key.endswith('/'):
-                        continue
-                    
-                    # Extract video info from S3 key
-                    # Format: videos/{uuid}/{filename}
-                    parts = key.split('/')
-                    if len(parts) >= 3:
-                        uuid = parts[1]
-                        filename = '/'.join(parts[2:])  # Handle nested paths
-                        
-                        videos[key] = {
-                            's3_key': key,
-                            'uuid': uuid,
-                            'filename': filename,
-                            'size': size,
-                            'last_modified': last_modified,
-                            'size_mb': round(size / (1024 * 1024), 2)
-                        }
-                        
-                        total_size += size
-                        file_count += 1
+            if to_list or len(cached) != len(prefixes):
+                self._save_s3_cache(by_prefix, listed_at)
             
-            logger.info(f"✅ Found {file_count} video files in S3")
+            total_size = sum(video.size for video in videos.values())
+            
+            logger.info(f"✅ Found {len(videos)} video files in S3 ({len(prefixes)} directories)")
             logger.info(f"📊 Total S3 video storage: {round(total_size / (1024**3), 2)} GB")
             return videos
             
@@ -126,39 +276,92 @@ class DatabaseS3Analyzer:
             logger.error(f"❌ S3 error: {e}")
             return {}
     
+    def _load_s3_cache(self) -> Tuple[Dict[str, Dict[str, S3Entry]], Optional[datetime]]:
+        """Cached S3 entries by directory prefix, and when the full listing was taken"""
+        if not self.cache_path or not Path(self.cache_path).exists():
+            return {}, None
+        
+        try:
+            with sqlite3.connect(self.cache_path) as conn:
+                row = conn.execute("SELECT listed_at FROM listings WHERE bucket = ?",
+                                   (self.bucket_name,)).fetchone()
+                if not row:
+                    return {}, None
+                
+                cached = {prefix: {} for (prefix,) in conn.execute(
+                    "SELECT prefix FROM s3_prefixes WHERE bucket = ?", (self.bucket_name,))}
+                for prefix, key, uuid, filename, size, last_modified in conn.execute(
+                        "SELECT prefix, s3_key, uuid, filename, size, last_modified "
+                        "FROM s3_videos WHERE bucket = ? ORDER BY s3_key", (self.bucket_name,)):
+                    cached[prefix][key] = S3Entry(key, uuid, filename, size, datetime.fromisoformat(last_modified))
+                
+                return cached, datetime.fromisoformat(row[0])
+                
+        except Exception as e:
+            logger.warning(f"⚠️  Ignoring unreadable S3 cache {self.cache_path}: {e}")
+            return {}, None
+    
+    def _save_s3_cache(self, by_prefix: Dict[str, Dict[str, S3Entry]], listed_at: datetime):
+        """Replace this bucket's cached S3 inventory"""
+        if not self.cache_path:
+            return
+        
+        try:
+            Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+            with sqlite3.connect(self.cache_path) as conn:
+                conn.executescript("""
+                    PRAGMA journal_mode = WAL;
+                    PRAGMA synchronous = NORMAL;
+                    CREATE TABLE IF NOT EXISTS listings (bucket TEXT PRIMARY KEY, listed_at TEXT NOT NULL);
+                    CREATE TABLE IF NOT EXISTS s3_prefixes (
+                        bucket TEXT, prefix TEXT, PRIMARY KEY (bucket, prefix)
+                    ) WITHOUT ROWID;
+                    CREATE TABLE IF NOT EXISTS s3_videos (
+                        bucket TEXT, s3_key TEXT, prefix TEXT, uuid TEXT, filename TEXT,
+                        size INTEGER, last_modified TEXT, PRIMARY KEY (bucket, s3_key)
+                    ) WITHOUT ROWID;
+                """)
+                # One transaction, committed when the with block exits
+                conn.execute("DELETE FROM s3_prefixes WHERE bucket = ?", (self.bucket_name,))
+                conn.execute("DELETE FROM s3_videos WHERE bucket = ?", (self.bucket_name,))
+                conn.executemany("INSERT INTO s3_prefixes VALUES (?, ?)",
+                                 ((self.bucket_name, prefix) for prefix in by_prefix))
+                conn.executemany("INSERT INTO s3_videos VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                    (self.bucket_name, entry.s3_key, prefix, entry.uuid, entry.filename,
+                     entry.size, entry.last_modified.isoformat())
+                    for prefix, prefix_videos in by_prefix.items()
+                    for entry in prefix_videos.values()
+                ))
+                conn.execute("INSERT OR REPLACE INTO listings VALUES (?, ?)",
+                             (self.bucket_name, listed_at.isoformat()))
+            
+        except Exception as e:
+            logger.warning(f"⚠️  Could not update S3 cache {self.cache_path}: {e}")
+    
     def analyze_discrepancies(self) -> Dict:
         """Perform comprehensive analysis of discrepancies"""
         logger.info("🧠 Performing discrepancy analysis...")
         
-        db_s3_keys = set()
-        db_with_s3 = 0
-        db_without_s3 = 0
-        
         # Analyze database records
-        for video_id, video in self.db_videos.items():
-            if video.get('s3_key'):
-                db_s3_keys.add(video['s3_key'])
-                db_with_s3 += 1
-            else:
-                db_without_s3 += 1
-        
-        # Get actual S3 keys
-        actual_s3_keys = set(self.s3_videos.keys())
+        s3_keys = self.db_videos['s3_key']
+        db_with_s3 = sum(map(bool, s3_keys))
+        db_without_s3 = len(s3_keys) - db_with_s3
         
-        # Find discrepancies
-        db_keys_not_in_s3 = db_s3_keys - actual_s3_keys  # Database claims these exist but they don't
-        s3_keys_not_in_db = actual_s3_keys - db_s3_keys  # S3 has these but DB doesn't know about them
-        matching_keys = db_s3_keys & actual_s3_keys      # Perfect matches
+        # Find discrepancies, and the videos ready for transcription with them
+        comparison = self.compare_s3_keys()
+        db_keys_not_in_s3 = comparison.db_keys_not_in_s3
+        s3_keys_not_in_db = comparison.s3_keys_not_in_db
+        matching_keys = comparison.matching_keys
         
         # Analyze transcription status
-        transcription_analysis = self.analyze_transcription_status()
+        transcription_analysis = self.analyze_transcription_status(comparison.ready_for_transcription)
         
         # Analyze file patterns and potential matches
         pattern_analysis = self.analyze_file_patterns()
         
         results = {
             'summary': {
-                'total_db_records': len(self.db_videos),
+                'total_db_records': len(self.db_videos['id']),
                 'db_records_with_s3_key': db_with_s3,
                 'db_records_without_s3_key': db_without_s3,
                 'total_s3_files': len(self.s3_videos),
@@ -167,9 +370,9 @@ class DatabaseS3Analyzer:
                 's3_orphaned_files': len(s3_keys_not_in_db)
             },
             'discrepancies': {
-                'db_keys_not_in_s3': list(db_keys_not_in_s3),
-                's3_keys_not_in_db': list(s3_keys_not_in_db),
-                'matching_keys': list(matching_keys)
+                'db_keys_not_in_s3': db_keys_not_in_s3,
+                's3_keys_not_in_db': s3_keys_not_in_db,
+                'matching_keys': matching_keys
             },
             'transcription_analysis': transcription_analysis,
             'pattern_analysis': pattern_analysis
@@ -177,38 +380,81 @@ class DatabaseS3Analyzer:
         
         return results
     
-    def analyze_transcription_status(self) -> Dict:
-        """Analyze transcription status across database records"""
+    def compare_s3_keys(self) -> KeyComparison:
+        """Compare database S3 keys with the S3 inventory
+        
+        The set operations run inside SQLite against a temp table of S3 keys,
+        which also finds the videos ready for transcription in the same pass.
+        """
+        db_keys = "SELECT s3_key FROM videos WHERE s3_key <> ''"
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                # Keep the temp table and its index build in memory; the
+                # analyzed database itself is only read
+                conn.execute("PRAGMA temp_store = MEMORY")
+                conn.execute("PRAGMA cache_size = -200000")
+                conn.execute("CREATE TEMP TABLE s3_keys (k TEXT PRIMARY KEY) WITHOUT ROWID")
+                # One prepared statement in one transaction; sorted keys append
+                # to the primary key b-tree instead of splitting pages
+                conn.executemany("INSERT INTO s3_keys (k) VALUES (?)", ((key,) for key in sorted(self.s3_videos)))
+                
+                def keys(query: str) -> List[str]:
+                    return [row[0] for row in conn.execute(query)]
+                
+                return KeyComparison(
+                    keys(f"{db_keys} EXCEPT SELECT k FROM s3_keys"),
+                    keys(f"SELECT k FROM s3_keys EXCEPT {db_keys}"),
+                    keys(f"{db_keys} INTERSECT SELECT k FROM s3_keys"),
+                    conn.execute("""
+                        SELECT id, title, s3_key FROM videos
+                        JOIN s3_keys ON s3_keys.k = videos.s3_key
+                        WHERE coalesce(transcript_s3_key, '') = ''
+                        ORDER BY id
+                    """).fetchall()
+                )
+                
+        except Exception as e:
+            logger.error(f"❌ Database error: {e}, comparing keys in memory")
+            db_s3_keys = {key for key in self.db_videos['s3_key'] if key}
+            actual_s3_keys = set(self.s3_videos)
+            return KeyComparison(
+                list(db_s3_keys - actual_s3_keys),
+                list(actual_s3_keys - db_s3_keys),
+                list(db_s3_keys & actual_s3_keys),
+                self._ready_for_transcription()
+            )
+    
+    def _ready_for_transcription(self) -> List[Tuple[str, str, str]]:
+        """(id, title, s3_key) of videos in S3 without a transcript, from the loaded columns"""
+        columns = self.db_videos
+        return [
+            (video_id, title, s3_key)
+            for video_id, title, s3_key, transcript_s3_key in zip(
+                columns['id'], columns['title'], columns['s3_key'], columns['transcript_s3_key'])
+            if s3_key and s3_key in self.s3_videos and not transcript_s3_key
+        ]
+    
+    def analyze_transcription_status(self, ready: Optional[List[Tuple[str, str, str]]] = None) -> Dict:
+        """Analyze transcription status across database records
+        
+        ready is compare_s3_keys()'s ready_for_transcription; it is worked
+        out from the loaded columns when not given.
+        """
         logger.info("🎯 Analyzing transcription status...")
         
-        total_videos = len(self.db_videos)
-        with_transcript_s3_key = 0
-        with_transcript_s3_url = 0
-        with_transcription_service = 0
-        transcription_services = defaultdict(int)
-        
-        videos_ready_for_transcription = []
-        
-        for video_id, video in self.db_videos.items():
-            # Count transcription-related fields
-            if video.get('transcript_s3_key'):
-                with_transcript_s3_key += 1
-            if video.get('transcript_s3_url'):
-                with_transcript_s3_url += 1
-            if video.get('transcription_service'):
-                with_transcription_service += 1
-                transcription_services[video['transcription_service']] += 1
-            
-            # Identify videos ready for transcription (have S3 video but no transcript)
-            if (video.get('s3_key') and 
-                video['s3_key'] in self.s3_videos and 
-                not video.get('transcript_s3_key')):
-                videos_ready_for_transcription.append({
-                    'id': video_id,
-                    'title': video.get('title', 'Unknown'),
-                    's3_key': video['s3_key'],
-                    'size_mb': self.s3_videos[video['s3_key']]['size_mb']
-                })
+        columns = self.db_videos
+        total_videos = len(columns['id'])
+        
+        # Count transcription-related fields
+        with_transcript_s3_key = sum(map(bool, columns['transcript_s3_key']))
+        with_transcript_s3_url = sum(map(bool, columns['transcript_s3_url']))
+        transcription_services = Counter(filter(None, columns['transcription_service']))
+        with_transcription_service = sum(transcription_services.values())
+        
+        # Videos ready for transcription (have S3 video but no transcript)
+        if ready is None:
+            ready = self._ready_for_transcription()
         
         return {
             'total_videos': total_videos,
@@ -216,27 +462,38 @@ class DatabaseS3Analyzer:
             'with_transcript_s3_url': with_transcript_s3_url,
             'with_transcription_service': with_transcription_service,
             'transcription_services': dict(transcription_services),
-            'videos_ready_for_transcription': len(videos_ready_for_transcription),
-            'ready_videos_sample': videos_ready_for_transcription[:10]  # First 10 as sample
+            'videos_ready_for_transcription': len(ready),
+            'ready_videos_sample': [  # First 10 as sample
+                {'id': video_id, 'title': title, 's3_key': s3_key, 'size_mb': self.s3_videos[s3_key].size_mb}
+                for video_id, title, s3_key in ready[:10]
+            ]
         }
     
+    def get_database_uuids(self) -> Set[str]:
+        """Distinct video directory UUIDs referenced by database S3 keys"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                # SQLite slices the UUID out of each matching key, so no
+                # Python regex runs per row
+                cursor = conn.execute(
+                    "SELECT DISTINCT substr(s3_key, 8, 36) FROM videos WHERE s3_key GLOB ?",
+                    (UUID_KEY_GLOB,)
+                )
+                return {row[0] for row in cursor}
+                
+        except Exception as e:
+            logger.error(f"❌ Database error: {e}")
+            return set()
+    
     def analyze_file_patterns(self) -> Dict:
         """Analyze file naming patterns and potential matches"""
         logger.info("🔍 Analyzing file patterns...")
         
-        # Extract UUIDs from database S3 keys
-        db_uuids = set()
-        for video in self.db_videos.values():
-            if video.get('s3_key'):
-                # Extract UUID from s3_key like "videos/uuid/filename"
-                match = re.search(r'videos/([a-f0-9-]{36})/', video['s3_key'])
-                if match:
-                    db_uuids.add(match.group(1))
+        # Extract UUIDs from database S3 keys like "videos/uuid/filename"
+        db_uuids = self.get_database_uuids()
         
         # Extract UUIDs from actual S3 keys
-        s3_uuids = set()
-        for s3_key, s3_info in self.s3_videos.items():
-            s3_uuids.add(s3_info['uuid'])
+        s3_uuids = {s3_info.uuid for s3_info in self.s3_videos.values()}
         
         # Find UUID matches and mismatches
         uuid_matches = db_uuids & s3_uuids
@@ -244,19 +501,20 @@ class DatabaseS3Analyzer:
         s3_uuids_not_in_db = s3_uuids - db_uuids
         
         # Analyze filename patterns
-        s3_filenames = [info['filename'] for info in self.s3_videos.values()]
-        filename_patterns = defaultdict(int)
+        s3_filenames = [info.filename for info in self.s3_videos.values()]
+        filename_patterns = Counter()
         
         for filename in s3_filenames:
+            lower = filename.lower()
+            
             # Categorize by file extension
-            if '.' in filename:
-                ext = filename.split('.')[-1].lower()
-                filename_patterns[f'*.{ext}'] += 1
+            if '.' in lower:
+                filename_patterns['*.' + lower.rpartition('.')[2]] += 1
             
             # Check for common patterns
-            if 'streamable' in filename.lower():
+            if 'streamable' in lower:
                 filename_patterns['streamable_*'] += 1
-            if any(word in filename.lower() for word in ['test', 'sample', 'demo']):
+            if any(word in lower for word in TEST_FILE_WORDS):
                 filename_patterns['test_files'] += 1
         
         return {
@@ -275,117 +533,122 @@ class DatabaseS3Analyzer:
         """Generate comprehensive analysis report"""
         logger.info("📋 Generating comprehensive report...")
         
-        report = []
-        report.append("=" * 80)
-        report.append("🔍 DATABASE vs S3 COMPREHENSIVE ANALYSIS REPORT")
-        report.append("=" * 80)
-        report.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append(f"Database: {self.db_path}")
-        report.append(f"S3 Bucket: {self.bucket_name}")
-        report.append("")
+        # Lines are written straight into one buffer rather than collected
+        # in a list and joined at the end
+        report = io.StringIO()
+        write = report.write
+        
+        write(RULE)
+        write("🔍 DATABASE vs S3 COMPREHENSIVE ANALYSIS REPORT\n")
+        write(RULE)
+        write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        write(f"Database: {self.db_path}\n")
+        write(f"S3 Bucket: {self.bucket_name}\n")
+        write("\n")
         
         # Summary Statistics
         summary = self.analysis_results['summary']
-        report.append("📊 SUMMARY STATISTICS")
-        report.append("-" * 40)
-        report.append(f"Total database records: {summary['total_db_records']:,}")
-        report.append(f"  • With S3 key: {summary['db_records_with_s3_key']:,}")
-        report.append(f"  • Without S3 key: {summary['db_records_without_s3_key']:,}")
-        report.append(f"Total S3 video files: {summary['total_s3_files']:,}")
-        report.append(f"Perfect DB ↔ S3 matches: {summary['perfect_matches']:,}")
-        report.append(f"DB keys missing in S3: {summary['db_keys_missing_in_s3']:,}")
-        report.append(f"S3 files not in DB: {summary['s3_orphaned_files']:,}")
-        report.append("")
+        write("📊 SUMMARY STATISTICS\n")
+        write(SECTION_RULE)
+        write(f"Total database records: {summary['total_db_records']:,}\n")
+        write(f"  • With S3 key: {summary['db_records_with_s3_key']:,}\n")
+        write(f"  • Without S3 key: {summary['db_records_without_s3_key']:,}\n")
+        write(f"Total S3 video files: {summary['total_s3_files']:,}\n")
+        write(f"Perfect DB ↔ S3 matches: {summary['perfect_matches']:,}\n")
+        write(f"DB keys missing in S3: {summary['db_keys_missing_in_s3']:,}\n")
+        write(f"S3 files not in DB: {summary['s3_orphaned_files']:,}\n")
+        write("\n")
         
         # Data Integrity Issues
-        report.append("🚨 DATA INTEGRITY ISSUES")
-        report.append("-" * 40)
+        write("🚨 DATA INTEGRITY ISSUES\n")
+        write(SECTION_RULE)
         
         discrepancies = self.analysis_results['discrepancies']
         missing_ratio = (summary['db_keys_missing_in_s3'] / summary['db_records_with_s3_key'] * 100) if summary['db_records_with_s3_key'] > 0 else 0
         orphaned_ratio = (summary['s3_orphaned_files'] / summary['total_s3_files'] * 100) if summary['total_s3_files'] > 0 else 0
         
-        report.append(f"Database integrity: {missing_ratio:.1f}% of DB S3 keys are invalid")
-        report.append(f"S3 orphan rate: {orphaned_ratio:.1f}% of S3 files not tracked in DB")
-        report.append("")
+        write(f"Database integrity: {missing_ratio:.1f}% of DB S3 keys are invalid\n")
+        write(f"S3 orphan rate: {orphaned_ratio:.1f}% of S3 files not tracked in DB\n")
+        write("\n")
         
         # Transcription Analysis
         trans = self.analysis_results['transcription_analysis']
-        report.append("🎯 TRANSCRIPTION STATUS ANALYSIS")
-        report.append("-" * 40)
-        report.append(f"Total videos: {trans['total_videos']:,}")
-        report.append(f"With transcript S3 key: {trans['with_transcript_s3_key']:,}")
-        report.append(f"With transcript S3 URL: {trans['with_transcript_s3_url']:,}")
-        report.append(f"With transcription service: {trans['with_transcription_service']:,}")
-        report.append(f"Ready for transcription: {trans['videos_ready_for_transcription']:,}")
+        write("🎯 TRANSCRIPTION STATUS ANALYSIS\n")
+        write(SECTION_RULE)
+        write(f"Total videos: {trans['total_videos']:,}\n")
+        write(f"With transcript S3 key: {trans['with_transcript_s3_key']:,}\n")
+        write(f"With transcript S3 URL: {trans['with_transcript_s3_url']:,}\n")
+        write(f"With transcription service: {trans['with_transcription_service']:,}\n")
+        write(f"Ready for transcription: {trans['videos_ready_for_transcription']:,}\n")
         
         if trans['transcription_services']:
-            report.append("\nTranscription services used:")
+            write("\nTranscription services used:\n")
             for service, count in trans['transcription_services'].items():
-                report.append(f"  • {service}: {count:,} videos")
+                write(f"  • {service}: {count:,} videos\n")
         
-        report.append("")
+        write("\n")
         
         # Pattern Analysis
         patterns = self.analysis_results['pattern_analysis']
-        report.append("🔍 FILE PATTERN ANALYSIS")
-        report.append("-" * 40)
+        write("🔍 FILE PATTERN ANALYSIS\n")
+        write(SECTION_RULE)
         
         uuid_analysis = patterns['uuid_analysis']
-        report.append(f"UUID Directory Analysis:")
-        report.append(f"  • Database UUIDs: {uuid_analysis['db_uuids']:,}")
-        report.append(f"  • S3 UUIDs: {uuid_analysis['s3_uuids']:,}")
-        report.append(f"  • UUID matches: {uuid_analysis['uuid_matches']:,}")
-        report.append(f"  • DB UUIDs not in S3: {uuid_analysis['db_uuids_not_in_s3']:,}")
-        report.append(f"  • S3 UUIDs not in DB: {uuid_analysis['s3_uuids_not_in_db']:,}")
-        
-        report.append(f"\nFile type distribution:")
+        write(f"UUID Directory Analysis:\n")
+        write(f"  • Database UUIDs: {uuid_analysis['db_uuids']:,}\n")
+        write(f"  • S3 UUIDs: {uuid_analysis['s3_uuids']:,}\n")
+        write(f"  • UUID matches: {uuid_analysis['uuid_matches']:,}\n")
+        write(f"  • DB UUIDs not in S3: {uuid_analysis['db_uuids_not_in_s3']:,}\n")
+        write(f"  • S3 UUIDs not in DB: {uuid_analysis['s3_uuids_not_in_db']:,}\n")
+        
+        write(f"\nFile type distribution:\n")
         for pattern, count in patterns['filename_patterns'].items():
-            report.append(f"  • {pattern}: {count:,} files")
+            write(f"  • {pattern}: {count:,} files\n")
         
-        report.append("")
+        write("\n")
         
         # Actionable Recommendations
-        report.append("💡 ACTIONABLE RECOMMENDATIONS")
-        report.append("-" * 40)
+        write("💡 ACTIONABLE RECOMMENDATIONS\n")
+        write(SECTION_RULE)
         
         if summary['db_keys_missing_in_s3'] > 100:
-            report.append("🔴 CRITICAL: Large number of invalid S3 keys in database")
-            report.append("   → Run S3 key correction/migration script")
+            write("🔴 CRITICAL: Large number of invalid S3 keys in database\n")
+            write("   → Run S3 key correction/migration script\n")
         
         if trans['videos_ready_for_transcription'] > 0:
             estimated_cost = trans['videos_ready_for_transcription'] * 20  # ~$20 per video estimate
-            report.append(f"🟡 OPPORTUNITY: {trans['videos_ready_for_transcription']:,} videos ready for transcription")
-            report.append(f"   → Estimated cost: ${estimated_cost:,} (OpenAI Whisper)")
-            report.append(f"   → Command: python3 transcribe_s3_videos.py {min(10, trans['videos_ready_for_transcription'])}")
+            write(f"🟡 OPPORTUNITY: {trans['videos_ready_for_transcription']:,} videos ready for transcription\n")
+            write(f"   → Estimated cost: ${estimated_cost:,} (OpenAI Whisper)\n")
+            write(f"   → Command: python3 transcribe_s3_videos.py {min(10, trans['videos_ready_for_transcription'])}\n")
         
         if summary['s3_orphaned_files'] > 50:
-            report.append("🟠 CLEANUP: Many orphaned S3 files not tracked in database")
-            report.append("   → Consider S3 cleanup or database sync")
+            write("🟠 CLEANUP: Many orphaned S3 files not tracked in database\n")
+            write("   → Consider S3 cleanup or database sync\n")
         
-        report.append("")
+        write("\n")
         
         # Sample Data
         if trans['ready_videos_sample']:
-            report.append("📋 SAMPLE VIDEOS READY FOR TRANSCRIPTION")
-            report.append("-" * 40)
+            write("📋 SAMPLE VIDEOS READY FOR TRANSCRIPTION\n")
+            write(SECTION_RULE)
             for i, video in enumerate(trans['ready_videos_sample'], 1):
                 title = video['title'][:50] + "..." if len(video['title']) > 50 else video['title']
-                report.append(f"{i:2d}. {title}")
-                report.append(f"     ID: {video['id']}")
-                report.append(f"     Size: {video['size_mb']} MB")
-                report.append(f"     S3: {video['s3_key']}")
-                report.append("")
+                write(f"{i:2d}. {title}\n")
+                write(f"     ID: {video['id']}\n")
+                write(f"     Size: {video['size_mb']} MB\n")
+                write(f"     S3: {video['s3_key']}\n")
+                write("\n")
         
-        report.append("=" * 80)
+        write(RULE)
         
-        return "\n".join(report)
+        # No newline after the closing rule; print() adds its own
+        return report.getvalue()[:-1]
     
     def save_detailed_results(self, filename: str = None):
-        """Save detailed analysis results to JSON file"""
+        """Save detailed analysis results to a gzipped JSON file"""
         if not filename:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"db_s3_analysis_{timestamp}.json"
+            filename = f"db_s3_analysis_{timestamp}.json.gz"
         
         # Add sample data for detailed inspection
         detailed_results = self.analysis_results.copy()
@@ -399,13 +662,16 @@ class DatabaseS3Analyzer:
             detailed_results['sample_orphaned_s3_files'] = discrepancies['s3_keys_not_in_db'][:20]
         
         # Add database sample
-        detailed_results['sample_db_records'] = list(self.db_videos.values())[:10]
+        detailed_results['sample_db_records'] = [
+            dict(zip(DB_COLUMNS, row)) for row in islice(zip(*self.db_videos.values()), 10)
+        ]
         
         # Add S3 sample
-        detailed_results['sample_s3_files'] = list(self.s3_videos.values())[:10]
+        detailed_results['sample_s3_files'] = [entry.to_dict() for entry in islice(self.s3_videos.values(), 10)]
         
-        with open(filename, 'w') as f:
-            json.dump(detailed_results, f, indent=2, default=str)
+        # Key lists compress well; a low level keeps compression cheap
+        with gzip.open(filename, 'wb', compresslevel=3) as f:
+            f.write(_dump_json(detailed_results))
         
         logger.info(f"💾 Detailed results saved to: {filename}")
         return filename
@@ -414,9 +680,13 @@ class DatabaseS3Analyzer:
         """Run complete analysis pipeline"""
         logger.info("🚀 Starting comprehensive database vs S3 analysis...")
         
-        # Step 1: Load data
-        self.db_videos = self.get_database_videos()
-        self.s3_videos = self.get_s3_videos()
+        # Step 1: Load data - the database read and the S3 listing are
+        # independent, so they run side by side
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            db_future = executor.submit(self.get_database_videos)
+            s3_future = executor.submit(self.get_s3_videos)
+            self.db_videos = db_future.result()
+            self.s3_videos = s3_future.result()
         
         # Step 2: Analyze discrepancies
         self.analysis_results = self.analyze_discrepancies()
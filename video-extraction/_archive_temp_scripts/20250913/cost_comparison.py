@@ -5,6 +5,15 @@ Updated with OpenAI Whisper API integration and correct cost calculations.
 """
 from transcription_config import TranscriptionConfig
 
+# Per-minute rates by service; Google bills per hour, so its hourly prices
+# are divided out once here instead of on every estimate
+COST_PER_MINUTE = {
+    'openai': 0.006,
+    'google_best': 2.16 / 60,
+    'google_premium': 2.88 / 60,
+    'aws': 0.024,
+}
+
 def compare_transcription_costs():
     """Compare transcription costs using actual pricing from transcription config"""
     num_videos = 336
@@ -43,7 +52,7 @@ def compare_transcription_costs():
     print(f'   • Per Video: ${google_premium["cost_per_video"]:.3f}')
     
     # AWS Transcribe (manual calculation for comparison)
-    aws_per_minute = 0.024
+    aws_per_minute = COST_PER_MINUTE['aws']
     aws_total = aws_per_minute * total_minutes
     print(f'\n🔶 AWS Transcribe:')
     print(f'   • Pricing: ${aws_per_minute:.3f}/minute')
@@ -96,24 +105,16 @@ def compare_transcription_costs():
 
 def get_cost_for_duration(minutes, service='openai'):
     """Get cost estimate for specific duration"""
-    if service == 'openai':
-        return minutes * 0.006
-    elif service == 'google_best':
-        return (minutes / 60) * 2.16  # Convert to hours for Google pricing
-    elif service == 'google_premium':
-        return (minutes / 60) * 2.88
-    elif service == 'aws':
-        return minutes * 0.024
-    else:
-        return 0
+    return minutes * COST_PER_MINUTE.get(service, 0)
 
 def quick_cost_comparison(minutes):
     """Quick cost comparison for any duration"""
+    costs = {service: minutes * rate for service, rate in COST_PER_MINUTE.items()}
     print(f'\n⏱️  Quick Cost Calculator ({minutes} minutes):')
-    print(f'   OpenAI Whisper:     ${get_cost_for_duration(minutes, "openai"):.2f}')
-    print(f'   Google latest_long: ${get_cost_for_duration(minutes, "google_best"):.2f}')
-    print(f'   Google chirp_2:     ${get_cost_for_duration(minutes, "google_premium"):.2f}')
-    print(f'   AWS Transcribe:     ${get_cost_for_duration(minutes, "aws"):.2f}')
+    print(f'   OpenAI Whisper:     ${costs["openai"]:.2f}')
+    print(f'   Google latest_long: ${costs["google_best"]:.2f}')
+    print(f'   Google chirp_2:     ${costs["google_premium"]:.2f}')
+    print(f'   AWS Transcribe:     ${costs["aws"]:.2f}')
 
 if __name__ == "__main__":
     compare_transcription_costs()